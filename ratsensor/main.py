@@ -2,9 +2,11 @@
 
 import sys
 import os
+import time
 import logging
 import signal
-from logging.handlers import TimedRotatingFileHandler
+import atexit
+from logging.handlers import TimedRotatingFileHandler, MemoryHandler
 from typing import Optional
 
 # --- Add project root to Python path ---
@@ -21,6 +23,7 @@ from ratsensor.adapters.identity.file import FileDeviceIdentityProvider
 from ratsensor.adapters.storage.sqlite import SQLiteStorageAdapter
 from ratsensor.adapters.sensor.simulated import SimulatedSensorReader
 from ratsensor.adapters.system_info.simulated import SimulatedSystemInfoReader
+from ratsensor.adapters.system_info.procfs import ProcfsSystemInfoReader, PROCFS_AVAILABLE
 from ratsensor.adapters.command.os_command import OSCommandExecutor
 from ratsensor.adapters.publisher.mqtt import MqttAdapter
 
@@ -39,8 +42,25 @@ except ImportError:
 
 
 # --- Global Logger Setup ---
+class CachedTimeFormatter(logging.Formatter):
+    """Formatter that reuses the formatted asctime for records logged within the same second."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._time_cache = (None, "") # (second, formatted), swapped as one tuple for thread safety
+
+    def formatTime(self, record, datefmt=None):
+        if datefmt:
+            return super().formatTime(record, datefmt)
+        second = int(record.created)
+        cached_second, formatted = self._time_cache
+        if second != cached_second:
+            formatted = time.strftime(self.default_time_format, self.converter(record.created))
+            self._time_cache = (second, formatted)
+        return self.default_msec_format % (formatted, record.msecs)
+
 # Configure logging early, before loading other modules that might log
-log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+# One formatter instance shared by the console and file handlers
+log_formatter = CachedTimeFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("ratsensor") # Get root logger for the package
 logger.setLevel(logging.INFO) # Set default level
 
@@ -51,14 +71,41 @@ logger.addHandler(stream_handler)
 
 # File Handler (configured later once config is loaded)
 file_handler = None
+# Buffers records in memory and writes them to file_handler in batches
+buffered_handler = None
 
 # --- Global Service Instance ---
 # Allows signal handler to access the service for shutdown
 monitoring_service: Optional[SensorMonitoringService] = None
 
+class BufferedLogHandler(MemoryHandler):
+    """MemoryHandler that also flushes once buffered records are older than max_delay seconds.
+
+    The age is checked when a record is emitted and by flush_if_stale(), which the
+    service calls once per cycle so a quiet loop doesn't hold records in memory.
+    """
+    def __init__(self, capacity, target, flushLevel=logging.ERROR, max_delay=60.0):
+        super().__init__(capacity, flushLevel=flushLevel, target=target, flushOnClose=True)
+        self.max_delay = max_delay
+
+    def _is_stale(self, now):
+        return bool(self.buffer) and now - self.buffer[0].created >= self.max_delay
+
+    def shouldFlush(self, record):
+        return super().shouldFlush(record) or self._is_stale(record.created)
+
+    def flush_if_stale(self):
+        if self._is_stale(time.time()):
+            self.flush()
+
 def setup_logging(config):
     """Configure file logging based on loaded config."""
     global file_handler
+    global buffered_handler
+    try:
+        logger.setLevel(config.log_level)
+    except ValueError:
+        logger.warning(f"Invalid LOG_LEVEL '{config.log_level}', keeping INFO.")
     log_file = config.log_file
     log_dir = os.path.dirname(log_file)
     try:
@@ -72,18 +119,22 @@ def setup_logging(config):
             filename=log_file, when='D', interval=7, backupCount=2, encoding='utf-8'
         )
         file_handler.setFormatter(log_formatter)
-        logger.addHandler(file_handler)
+        # Batch file writes: flush every 128 records, on ERROR, or once the oldest is max_delay old
+        buffered_handler = BufferedLogHandler(capacity=128, target=file_handler)
+        logger.addHandler(buffered_handler)
+        atexit.register(buffered_handler.flush)
         logger.info(f"File logging configured to {log_file} (rotate daily, keep 3 weeks)")
     except Exception as e:
         logger.error(f"Failed to configure file logging to {log_file}: {e}", exc_info=True)
         file_handler = None # Ensure it's None if setup fails
+        buffered_handler = None
 
 def shutdown_handler(signum, frame):
     """Handle termination signals gracefully."""
     logger.warning(f"Received signal {signum}. Initiating graceful shutdown...")
     if monitoring_service:
-        # Stop the main loop (if running)
-        monitoring_service._running = False
+        # Stop the main loop (if running); wakes it immediately if it is waiting
+        monitoring_service.stop()
         # Shutdown sequence is called after the loop exits or if it wasn't started
     else:
         logger.warning("Monitoring service not initialized, exiting.")
@@ -92,6 +143,7 @@ def shutdown_handler(signum, frame):
 def main():
     global monitoring_service
     global file_handler
+    global buffered_handler
 
     # --- 1. Configuration ---
     config_provider = EnvironmentConfigProvider() # Default .env path
@@ -103,7 +155,7 @@ def main():
     logger.info(f"Simulation Mode: {config.simulation_mode}")
     if not HARDWARE_AVAILABLE:
         logger.warning("Hardware-specific libraries (Adafruit_DHT, smbus2) not found.")
-    if not PSUTIL_AVAILABLE:
+    if not PSUTIL_AVAILABLE and not PROCFS_AVAILABLE:
         logger.warning("psutil library not found, system info will be simulated or unavailable.")
 
     # --- 3. Instantiate Adapters ---
@@ -113,10 +165,12 @@ def main():
     if not device_id or device_id.startswith("temp-"):
          logger.critical("Failed to obtain a persistent Device ID. Cannot continue.")
          sys.exit(1)
+    # Interned: every reading carries this one string object for the whole run
+    device_id = sys.intern(device_id)
     logger.info(f"Device ID: {device_id}")
 
 
-    storage_adapter = SQLiteStorageAdapter(config.database_file)
+    storage_adapter = SQLiteStorageAdapter(config.database_file, max_unsaved_rows=config.db_buffer_max_reads)
     command_executor = OSCommandExecutor()
 
     # Choose Sensor Reader based on simulation mode and availability
@@ -130,6 +184,7 @@ def main():
             sensor_reader = HardwareSensorReader(
                 device_id=device_id,
                 dht_pin=config.dht_pin,
+                cache_ttl=config.sensor_cache_ttl_seconds,
             )
         except Exception as e:
              logger.error(f"Failed to instantiate HardwareSensorReader: {e}. Falling back to simulation.", exc_info=True)
@@ -140,21 +195,28 @@ def main():
         sensor_reader = SimulatedSensorReader(device_id=device_id)
         config.simulation_mode = True
 
-    # Choose System Info Reader
-    sys_info_reader: SystemInfoReader
+    # Choose System Info Reader: procfs, then psutil, then simulation
+    sys_info_reader: Optional[SystemInfoReader] = None
     if config.simulation_mode: # Use simulation if sensors are simulated too
         logger.info("Using Simulated System Info Reader.")
         sys_info_reader = SimulatedSystemInfoReader(device_id=device_id)
-    elif PSUTIL_AVAILABLE and PsutilSystemInfoReader:
-        logger.info("Using Psutil System Info Reader.")
-        try:
-             sys_info_reader = PsutilSystemInfoReader(device_id=device_id)
-        except Exception as e:
-             logger.error(f"Failed to instantiate PsutilSystemInfoReader: {e}. Falling back to simulation.", exc_info=True)
-             sys_info_reader = SimulatedSystemInfoReader(device_id=device_id)
     else:
-        logger.warning("Psutil reader requested but unavailable/failed. Falling back to simulation.")
-        sys_info_reader = SimulatedSystemInfoReader(device_id=device_id)
+        if PROCFS_AVAILABLE:
+            # Reads /proc directly; cheaper per cycle than psutil on the Pi
+            logger.info("Using Procfs System Info Reader.")
+            try:
+                 sys_info_reader = ProcfsSystemInfoReader(device_id=device_id)
+            except Exception as e:
+                 logger.error(f"Failed to instantiate ProcfsSystemInfoReader: {e}. Trying psutil.", exc_info=True)
+        if sys_info_reader is None and PSUTIL_AVAILABLE and PsutilSystemInfoReader:
+            logger.info("Using Psutil System Info Reader.")
+            try:
+                 sys_info_reader = PsutilSystemInfoReader(device_id=device_id)
+            except Exception as e:
+                 logger.error(f"Failed to instantiate PsutilSystemInfoReader: {e}. Falling back to simulation.", exc_info=True)
+        if sys_info_reader is None:
+            logger.warning("No real system info reader available. Falling back to simulation.")
+            sys_info_reader = SimulatedSystemInfoReader(device_id=device_id)
 
 
     # MQTT Adapter (handles both publishing and admin listening)
@@ -169,7 +231,9 @@ def main():
         storage=storage_adapter,
         identity_provider=identity_provider,
         command_executor=command_executor,
-        admin_listener=mqtt_adapter if config.listen_for_admin else None # Pass adapter if listening
+        admin_listener=mqtt_adapter if config.listen_for_admin else None, # Pass adapter if listening
+        # Bounds how long buffered log lines wait for the file, even when nothing new is logged
+        on_cycle=buffered_handler.flush_if_stale if buffered_handler else None,
     )
 
     # --- 5. Setup Signal Handling for Graceful Shutdown ---
@@ -178,14 +242,15 @@ def main():
 
     # --- 6. Start the Service ---
     try:
-        # Start MQTT connection management (non-blocking)
-        mqtt_adapter.connect()
-
-        # Start admin command listening if enabled (non-blocking)
+        # Register the admin handler first so commands delivered right after
+        # the first CONNACK are handled
         if config.listen_for_admin:
             # Pass the service's handler method to the listener adapter
             mqtt_adapter.start_listening(monitoring_service._handle_admin_command)
 
+        # Start MQTT connection management (non-blocking)
+        mqtt_adapter.connect()
+
         # Run the main blocking loop
         monitoring_service.run()
 
@@ -202,9 +267,11 @@ def main():
              try: mqtt_adapter.disconnect()
              except: pass
 
-        # Clean up logging file handler
+        # Clean up logging file handler (closing the buffer flushes it)
+        if buffered_handler:
+            logger.removeHandler(buffered_handler)
+            buffered_handler.close()
         if file_handler:
-            logger.removeHandler(file_handler)
             file_handler.close()
         logger.info("Application exit.")
         sys.exit(0) # Explicitly exit
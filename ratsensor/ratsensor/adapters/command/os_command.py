@@ -1,6 +1,6 @@
 # ratsensor/adapters/command/os_command.py
-import os
 import logging
+import subprocess
 import time
 from ratsensor.core.ports import CommandExecutor
 
@@ -8,15 +8,16 @@ logger = logging.getLogger(__name__)
 
 class OSCommandExecutor(CommandExecutor):
     def execute_reboot(self) -> None:
-        logger.warning("Executing system reboot command via os.system...")
+        logger.warning("Executing system reboot command...")
         # Add a small delay to allow logs/messages to potentially flush
         time.sleep(2)
         try:
             # IMPORTANT: Ensure the user running this script has passwordless
             # sudo privileges for the 'reboot' command, or run the script as root.
             # This is a security risk if the MQTT topic is not secured.
-            os.system('sudo reboot')
-            # If os.system returns, it likely failed.
-            logger.error("Reboot command execution may have failed (os.system returned).")
+            # Exec'd directly, no /bin/sh in between. -n: fail instead of prompting for a password.
+            result = subprocess.run(['sudo', '-n', '/sbin/reboot'], check=False, timeout=10)
+            # If we are still running, it likely failed.
+            logger.error(f"Reboot command execution may have failed (exit code {result.returncode}).")
         except Exception as e:
             logger.error(f"Exception during reboot command execution: {e}", exc_info=True)
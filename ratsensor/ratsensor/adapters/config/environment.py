@@ -1,86 +1,137 @@
 import os
 import logging
-from dotenv import load_dotenv
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse
+from dotenv import dotenv_values
 from ratsensor.core.domain import AppConfig
 from ratsensor.core.ports import ConfigurationProvider
 
 logger = logging.getLogger(__name__)
 
+# Parsed env files keyed by (path, mtime), shared by all provider instances
+_DOTENV_CACHE: Dict[Tuple[str, float], Dict[str, str]] = {}
+
+# Probed once at import time; get_config() only reads the result
+try:
+    import adafruit_ltr390
+    import adafruit_dht
+    _HW_IMPORT_ERROR = None
+except ImportError as e:
+    _HW_IMPORT_ERROR = e
+
+def _to_bool(value: str) -> bool:
+    return value.lower() in ('true', '1', 't', 'yes', 'y')
+
+# AppConfig field -> (env var, default, cast). Read in a single pass by get_config().
+_CONFIG_SPEC: Tuple[Tuple[str, str, Any, Callable[[str], Any]], ...] = (
+    ('read_interval_seconds', 'READ_INTERVAL_SECONDS', 90, int),
+    ('db_save_interval_reads', 'DB_SAVE_INTERVAL_READS', 500, int),
+    ('db_save_interval_seconds', 'DB_SAVE_INTERVAL_SECONDS', 600, int),
+    ('db_buffer_max_reads', 'DB_BUFFER_MAX_READS', 10000, int),
+    ('mqtt_broker', 'MQTT_BROKER', 'localhost', str),
+    ('mqtt_port', 'MQTT_PORT', 1883, int),
+    ('mqtt_user', 'MQTT_USER', None, str),
+    ('mqtt_pass', 'MQTT_PASS', None, str),
+    ('mqtt_sensor_topic_template', 'MQTT_SENSOR_TOPIC_TEMPLATE', 'sensor/{}', str),
+    ('mqtt_info_topic_template', 'MQTT_INFO_TOPIC_TEMPLATE', 'info/{}', str),
+    ('mqtt_admin_topic_template', 'ADMIN_TOPIC', None, str), # e.g., "admin/{}"
+    ('listen_for_admin', 'LISTEN_FOR_ADMIN_COMMANDS', False, _to_bool),
+    ('mqtt_initial_retry_delay', 'MQTT_INITIAL_RETRY_DELAY', 15, int),
+    ('mqtt_max_retry_delay', 'MQTT_MAX_RETRY_DELAY', 300, int),
+    ('mqtt_retry_backoff_factor', 'MQTT_RETRY_BACKOFF_FACTOR', 2.0, float),
+    ('mqtt_keepalive', 'MQTT_KEEPALIVE', 45, int),
+    ('mqtt_publish_qos', 'MQTT_PUBLISH_QOS', 1, int),
+    ('mqtt_persistent_session', 'MQTT_PERSISTENT_SESSION', True, _to_bool),
+    ('mqtt_offline_buffer_size', 'MQTT_OFFLINE_BUFFER_SIZE', 200, int),
+    ('mqtt_protocol_v5', 'MQTT_PROTOCOL_V5', False, _to_bool),
+    ('publish_delta_temperature', 'PUBLISH_DELTA_TEMP', 0.3, float),
+    ('publish_delta_humidity', 'PUBLISH_DELTA_HUMIDITY', 1.0, float),
+    ('publish_delta_light', 'PUBLISH_DELTA_LIGHT', 50, int),
+    ('publish_delta_system_percent', 'PUBLISH_DELTA_SYSTEM_PERCENT', 1.0, float),
+    ('publish_heartbeat_intervals', 'PUBLISH_HEARTBEAT_INTERVALS', 10, int),
+    ('publish_combined_payload', 'PUBLISH_COMBINED_PAYLOAD', False, _to_bool),
+    ('device_id_file', 'DEVICE_ID_FILE', '/etc/ratsensor/device_id.json', str),
+    ('database_file', 'DATABASE_FILE', '/var/lib/ratsensor/sensor_data.db', str),
+    ('log_file', 'LOG_FILE', '/var/log/ratsensor/ratsensor.log', str),
+    ('log_level', 'LOG_LEVEL', 'INFO', str.upper),
+    ('simulation_mode', 'SIMULATION_MODE', False, _to_bool),
+    ('dht_pin', 'DHT_PIN', 4, int),
+    ('i2c_bus_number', 'I2C_BUS_NUMBER', 1, int),
+    ('sensor_cache_ttl_seconds', 'SENSOR_CACHE_TTL_SECONDS', None, int), # Unset: 2 x READ_INTERVAL_SECONDS
+)
+
+def _split_broker_url(broker: str, port: int) -> Tuple[str, int]:
+    """Accept MQTT_BROKER as 'tcp://host:port' (or mqtt://, [::1] for IPv6), 'host:port' or a bare host."""
+    if "://" in broker:
+        url = urlparse(broker)
+    elif broker.count(":") > 1 and not broker.startswith("["):
+        return broker, port # Unbracketed IPv6 literal: no port in it
+    else:
+        url = urlparse("tcp://" + broker)
+    try:
+        url_port = url.port
+    except ValueError:
+        logger.warning("Invalid value for MQTT_BROKER port: '%s'. Using default: %s", broker, port)
+        url_port = None
+    return url.hostname or 'localhost', url_port or port
+
 class EnvironmentConfigProvider(ConfigurationProvider):
     def __init__(self, env_file_path: str = "/etc/ratsensor/mqtt_config.env"):
         self.env_file_path = env_file_path
         self._config = None
 
-    def _load_env(self):
+    def _load_env(self) -> Dict[str, str]:
+        """Process environment with the env file's values on top (the file wins)."""
+        env = dict(os.environ)
         try:
-            if os.path.exists(self.env_file_path):
-                load_dotenv(self.env_file_path, override=True)
-                logger.info(f"Loaded environment variables from {self.env_file_path}")
-            else:
-                logger.warning(f"Environment file not found at {self.env_file_path}, using system environment.")
+            # stat instead of os.path.exists: one syscall, and the mtime keys the cache
+            key = (self.env_file_path, os.stat(self.env_file_path).st_mtime)
+            values = _DOTENV_CACHE.get(key)
+            if values is None:
+                # Variables without a value parse as None; load_dotenv skips those too
+                values = {k: v for k, v in dotenv_values(self.env_file_path).items() if v is not None}
+                _DOTENV_CACHE[key] = values
+            env.update(values)
+            logger.info("Loaded environment variables from %s", self.env_file_path)
+        except FileNotFoundError:
+            logger.warning("Environment file not found at %s, using system environment.", self.env_file_path)
         except Exception as e:
-            logger.error(f"Error loading environment file {self.env_file_path}: {e}")
+            logger.error("Error loading environment file %s: %s", self.env_file_path, e)
+        return env
 
     def get_config(self) -> AppConfig:
         if self._config is None:
-            self._load_env()
+            env = self._load_env()
             try:
-                # Helper to get env var with type casting and default
-                def get_env(key, default, cast_type=str):
-                    value = os.environ.get(key)
-                    if value is None:
-                        return default
+                values: Dict[str, Any] = {}
+                for field_name, env_key, default, cast_type in _CONFIG_SPEC:
+                    raw: Optional[str] = env.get(env_key)
+                    if raw is None:
+                        values[field_name] = default
+                        continue
                     try:
-                        return cast_type(value)
+                        values[field_name] = cast_type(raw)
                     except ValueError:
-                        logger.warning(f"Invalid value for {key}: '{value}'. Using default: {default}")
-                        return default
-
-                def get_bool_env(key, default):
-                    value = os.environ.get(key, str(default)).lower()
-                    return value in ('true', '1', 't', 'yes', 'y')
+                        logger.warning("Invalid value for %s: '%s'. Using default: %s", env_key, raw, default)
+                        values[field_name] = default
 
-                # Determine simulation mode early
-                hw_available = True
-                try:
-                    import adafruit_ltr390
-                    import adafruit_dht
-                except ImportError as e:
-                    hw_available = False
-                    logger.error(f"Failed to import hardware libraries: {e}")
+                # Simulation is forced when the hardware libraries are missing
+                hw_available = _HW_IMPORT_ERROR is None
+                if not hw_available:
+                    logger.error(f"Failed to import hardware libraries: {_HW_IMPORT_ERROR}")
 
-                sim_mode_env = get_bool_env('SIMULATION_MODE', False)
+                sim_mode_env = values['simulation_mode']
                 simulation_mode = sim_mode_env or not hw_available
                 if simulation_mode and not sim_mode_env:
                      logger.warning("Hardware libraries missing or failed import, forcing SIMULATION MODE.")
                 elif simulation_mode:
                      logger.info("SIMULATION MODE enabled via environment variable.")
+                values['simulation_mode'] = simulation_mode
+                values['mqtt_broker'], values['mqtt_port'] = _split_broker_url(values['mqtt_broker'], values['mqtt_port'])
 
-
-                self._config = AppConfig(
-                    read_interval_seconds=get_env('READ_INTERVAL_SECONDS', 90, int),
-                    db_save_interval_reads=get_env('DB_SAVE_INTERVAL_READS', 5, int),
-                    mqtt_broker=get_env('MQTT_BROKER', 'localhost'),
-                    mqtt_port=get_env('MQTT_PORT', 1883, int),
-                    mqtt_user=get_env('MQTT_USER', None),
-                    mqtt_pass=get_env('MQTT_PASS', None),
-                    mqtt_sensor_topic_template=get_env('MQTT_SENSOR_TOPIC_TEMPLATE', 'sensor/{}'),
-                    mqtt_info_topic_template=get_env('MQTT_INFO_TOPIC_TEMPLATE', 'info/{}'),
-                    mqtt_admin_topic_template=get_env('ADMIN_TOPIC', None), # e.g., "admin/{}"
-                    listen_for_admin=get_bool_env('LISTEN_FOR_ADMIN_COMMANDS', False),
-                    mqtt_initial_retry_delay=get_env('MQTT_INITIAL_RETRY_DELAY', 15, int),
-                    mqtt_max_retry_delay=get_env('MQTT_MAX_RETRY_DELAY', 300, int),
-                    mqtt_retry_backoff_factor=get_env('MQTT_RETRY_BACKOFF_FACTOR', 2.0, float),
-                    device_id_file=get_env('DEVICE_ID_FILE', '/etc/ratsensor/device_id.json'),
-                    database_file=get_env('DATABASE_FILE', '/var/lib/ratsensor/sensor_data.db'),
-                    log_file=get_env('LOG_FILE', '/var/log/ratsensor/ratsensor.log'),
-                    simulation_mode=simulation_mode,
-                    dht_pin=get_env('DHT_PIN', 4, int),
-                    i2c_bus_number=get_env('I2C_BUS_NUMBER', 1, int),
-                )
+                self._config = AppConfig(**values)
             except Exception as e:
                  logger.error(f"Error parsing configuration: {e}", exc_info=True)
                  # Return default config on error to allow potential startup
                  self._config = AppConfig(simulation_mode=True) # Force sim mode if config fails
         return self._config
-
@@ -2,6 +2,7 @@ import os
 import uuid
 import json
 import logging
+from typing import Optional
 from ratsensor.core.ports import DeviceIdentityProvider
 
 logger = logging.getLogger(__name__)
@@ -11,6 +12,28 @@ class FileDeviceIdentityProvider(DeviceIdentityProvider):
         self.file_path = file_path
         self._device_id: str | None = None
 
+    def _load_device_id(self) -> Optional[str]:
+        """Read the stored device ID. Returns None if the file doesn't exist yet or has no ID."""
+        try:
+            with open(self.file_path, 'r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None # First run: caller generates a new ID
+        device_id = data.get('device_id')
+        if not device_id:
+            logger.warning(f"device_id key missing in {self.file_path}. Generating new one.")
+        return device_id or None
+
+    def _save_device_id(self, device_id: str) -> None:
+        """Write the ID to a temp file and rename it into place, so a crash never leaves a truncated file."""
+        tmp_path = self.file_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            # Single known key and a hex/dash UUID: no JSON escaping needed
+            f.write(f'{{"device_id": "{device_id}"}}'.encode())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.file_path)
+
     def get_device_id(self) -> str:
         if self._device_id:
             return self._device_id
@@ -26,22 +49,16 @@ class FileDeviceIdentityProvider(DeviceIdentityProvider):
             return self._device_id
 
         try:
-            if os.path.exists(self.file_path):
-                with open(self.file_path, 'r') as f:
-                    data = json.load(f)
-                    device_id = data.get('device_id')
-                    if device_id:
-                        logger.info(f"Retrieved existing device ID: {device_id}")
-                        self._device_id = device_id
-                        return self._device_id
-                    else:
-                        logger.warning(f"device_id key missing in {self.file_path}. Generating new one.")
+            device_id = self._load_device_id()
+            if device_id:
+                logger.info(f"Retrieved existing device ID: {device_id}")
+                self._device_id = device_id
+                return self._device_id
 
             device_id = str(uuid.uuid4())
             logger.info(f"Generated new device ID: {device_id}")
-            with open(self.file_path, 'w') as f:
-                json.dump({'device_id': device_id}, f)
-                logger.info(f"Saved new device ID to {self.file_path}")
+            self._save_device_id(device_id)
+            logger.info(f"Saved new device ID to {self.file_path}")
             self._device_id = device_id
             return device_id
 
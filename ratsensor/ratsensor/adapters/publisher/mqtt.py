@@ -1,32 +1,83 @@
 import paho.mqtt.client as mqtt
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
 import logging
 import json
 import time
 import random
 import threading
-from typing import Optional, Union
-from dataclasses import asdict
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque, Optional, Set, Tuple, Union
+from dataclasses import fields
 
 from ratsensor.core.domain import SensorData, SystemInfo, AppConfig
 from ratsensor.core.ports import DataPublisher, AdminCommandListener, AdminCommandHandler
 
 logger = logging.getLogger(__name__)
 
+try:
+    import orjson # Optional: C JSON encoder, returns bytes that paho publishes as-is
+except ImportError:
+    orjson = None
+
+# Encoder picked once at import. json.dumps() with non-default options builds a new
+# JSONEncoder on every call; the stdlib fallback reuses a single instance instead.
+if orjson is not None:
+    _encode_payload = orjson.dumps
+else:
+    _encode_payload = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+# Payload keys per published type, resolved once. The dataclasses are flat, so a
+# shallow dict build replaces asdict() and its per-field recursive deepcopy.
+_PAYLOAD_FIELDS = {
+    cls: tuple(f.name for f in fields(cls) if f.metadata.get("publish", True))
+    for cls in (SensorData, SystemInfo)
+}
+
+def _payload_dict(data: Union[SensorData, SystemInfo]) -> dict:
+    return {name: getattr(data, name) for name in _PAYLOAD_FIELDS[type(data)]}
+
 class MqttAdapter(DataPublisher, AdminCommandListener):
     def __init__(self, config: AppConfig, device_id: str):
         self.config = config
         self.device_id = device_id
         self.client: Optional[mqtt.Client] = None
+        # Plain bool: reads and single assignments are atomic under the GIL, so it is
+        # read and cleared without the lock. _lock guards only compound state (the
+        # connected flip together with the _pending flush, and topic aliases).
         self._is_connected = False
         self._lock = threading.Lock()
         self._admin_handler: Optional[AdminCommandHandler] = None
         self._mqtt_thread: Optional[threading.Thread] = None
         self._stop_event = threading.Event()
-        self._last_connection_attempt_time = 0
+        # Set whenever a connection attempt resolves (CONNACK received or the attempt failed)
+        self._connect_event = threading.Event()
+        # time.monotonic() at which the next connection attempt is due
+        self._next_attempt_monotonic = 0.0
         self._current_retry_delay = config.mqtt_initial_retry_delay
+        # True once a connection is up with paho's network thread running: from then on
+        # paho reconnects by itself after a drop, and _connection_loop stays out of it
+        self._paho_reconnects = False
+        # (topic, payload) published while disconnected; oldest dropped when full
+        self._pending: Deque[Tuple[str, Union[str, bytes]]] = deque(maxlen=config.mqtt_offline_buffer_size)
 
         self.sensor_topic = config.mqtt_sensor_topic_template.format(self.device_id)
         self.info_topic = config.mqtt_info_topic_template.format(self.device_id)
+        # Retained online/offline status; the broker publishes the offline LWT for us
+        self.status_topic = f"status/{self.device_id}"
+        # Status payloads never change; encode them once
+        self._online_payload = json.dumps({"status": "online"}).encode()
+        self._lwt_payload = json.dumps({"status": "offline", "reason": "unexpected_disconnect"}).encode()
+        self._shutdown_payload = json.dumps({"status": "offline", "reason": "shutdown"}).encode()
+        # MQTT v5 topic aliases: after the first publish on a connection, the topic
+        # string is replaced by a 2-byte alias. QoS 0 only: paho replays unacked
+        # QoS>0 messages verbatim after a reconnect, when the broker has forgotten
+        # the aliases.
+        self._use_topic_aliases = config.mqtt_protocol_v5 and config.mqtt_publish_qos == 0
+        self._topic_alias_ids = {self.sensor_topic: 1, self.info_topic: 2}
+        self._topic_alias_max = 0 # Broker's limit, from CONNACK
+        self._aliased_topics: Set[str] = set() # Aliases registered on this connection
         self.admin_topic = None
         if config.listen_for_admin and config.mqtt_admin_topic_template:
              # Handle cases like "admin/{}" or just "admin/commands"
@@ -35,167 +86,254 @@ class MqttAdapter(DataPublisher, AdminCommandListener):
              else:
                  self.admin_topic = config.mqtt_admin_topic_template # Use as is
              logger.info(f"MQTT Admin topic configured: {self.admin_topic}")
+        # Admin handlers run off the paho network thread on a small, reused pool
+        self._admin_pool: Optional[ThreadPoolExecutor] = None
+        # True once SUBSCRIBE for admin_topic was sent on the current connection
+        self._admin_subscribed = False
 
     def _on_connect(self, client, userdata, flags, rc, properties=None):
-        with self._lock:
-            if rc == 0:
-                logger.info(f"MQTT: Successfully connected to broker {self.config.mqtt_broker}:{self.config.mqtt_port} (rc={rc})")
-                self._is_connected = True
-                self._current_retry_delay = self.config.mqtt_initial_retry_delay # Reset backoff
-                # Subscribe to admin topic if configured and connected
-                if self.admin_topic and self._admin_handler:
-                    try:
-                        result, mid = client.subscribe(self.admin_topic, qos=1) # Use QoS 1 for commands
-                        if result == mqtt.MQTT_ERR_SUCCESS:
-                            logger.info(f"MQTT: Subscribed to admin topic: {self.admin_topic}")
-                        else:
-                            logger.warning(f"MQTT: Failed to subscribe to admin topic {self.admin_topic} (Error code: {result})")
-                    except Exception as e:
-                        logger.error(f"MQTT: Error during subscription to {self.admin_topic}", exc_info=True)
-            else:
-                logger.error(f"MQTT: Connection failed with result code: {rc}. Check broker/credentials/network.")
-                self._is_connected = False
-                # Connection failed, backoff handled in connect loop
+        if rc != 0:
+            logger.error("MQTT: Connection failed with result code: %s. Check broker/credentials/network.", rc)
+            self._is_connected = False
+            # Connection failed, backoff handled in connect loop
+            self._connect_event.set()
+            return
 
-    def _on_disconnect(self, client, userdata, rc, properties=None):
+        alias_max = getattr(properties, "TopicAliasMaximum", 0) if properties else 0
+        # Only the state _publish() reads under the lock changes here: flipping the flag
+        # and taking the buffer together means no message lands in _pending unflushed
         with self._lock:
-            # Only log unexpected disconnects
-            if rc != 0:
-                logger.warning(f"MQTT: Unexpectedly disconnected from broker (rc={rc}). Will attempt reconnect.")
-            else:
-                logger.info("MQTT: Disconnected gracefully.")
-            self._is_connected = False
-        # Reconnect logic is handled by the background thread/connect method
+            self._is_connected = True
+            self._paho_reconnects = True
+            pending = list(self._pending)
+            self._pending.clear()
+            # Aliases do not survive a reconnect
+            self._aliased_topics.clear()
+            self._topic_alias_max = alias_max
+
+        logger.info("MQTT: Successfully connected to broker %s:%s (rc=%s)", self.config.mqtt_broker, self.config.mqtt_port, rc)
+        self._current_retry_delay = self.config.mqtt_initial_retry_delay # Reset backoff
+        # Subscribe once per CONNACK, whether or not a handler is registered yet;
+        # _on_message ignores commands until start_listening() provides one
+        self._admin_subscribed = False
+        if self.admin_topic:
+            self._subscribe_admin(client)
+        # Replaces the retained offline status left by the LWT or a previous shutdown
+        client.publish(self.status_topic, payload=self._online_payload, qos=1, retain=True)
+        if pending:
+            logger.info("MQTT: Sending %s messages buffered while offline.", len(pending))
+            for topic, payload in pending:
+                client.publish(topic, payload, qos=self.config.mqtt_publish_qos)
+        self._connect_event.set()
+
+    def _on_disconnect(self, client, userdata, flags, rc, properties=None):
+        self._is_connected = False
+        self._admin_subscribed = False
+        # Only log unexpected disconnects
+        if rc != 0:
+            logger.warning("MQTT: Unexpectedly disconnected from broker (rc=%s). Will attempt reconnect.", rc)
+        else:
+            logger.info("MQTT: Disconnected gracefully.")
+        # paho's network thread reconnects (with reconnect_delay_set's backoff)
 
     def _on_message(self, client, userdata, msg):
         topic = msg.topic
-        payload_str = ""
+        payload = msg.payload
         try:
-            payload_str = msg.payload.decode().strip()
-            logger.info(f"MQTT: Received message on topic '{topic}': {payload_str}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("MQTT: Received message on topic '%s': %s", topic, payload.decode(errors="replace").strip())
 
             if topic == self.admin_topic and self._admin_handler:
-                command = payload_str.lower()
-                # Run handler in a separate thread to avoid blocking MQTT loop
-                handler_thread = threading.Thread(target=self._admin_handler, args=(command,))
-                handler_thread.daemon = True
-                handler_thread.start()
+                # Commands are plain ASCII words: normalize the bytes, decode only the result
+                command = payload.strip().lower().decode("ascii", "replace")
+                # Run handler on the admin pool to avoid blocking MQTT loop
+                pool = self._admin_pool
+                if pool is None:
+                    logger.warning("MQTT: Admin command '%s' dropped, adapter is shutting down.", command)
+                    return
+                try:
+                    pool.submit(self._admin_handler, command)
+                except RuntimeError: # Pool shut down between the check and submit
+                    logger.warning("MQTT: Admin command '%s' dropped, adapter is shutting down.", command)
             else:
-                logger.debug(f"MQTT: Message ignored on topic {topic}.")
+                logger.debug("MQTT: Message ignored on topic %s.", topic)
 
         except Exception as e:
-            logger.error(f"MQTT: Error processing message on topic {topic}, payload '{payload_str}'", exc_info=True)
+            logger.error("MQTT: Error processing message on topic %s, payload %r", topic, payload, exc_info=True)
+
+    def _subscribe_admin(self, client: mqtt.Client) -> bool:
+        try:
+            # QoS 0: with a persistent session the broker would otherwise queue commands
+            # sent while we are offline (e.g. a second "reboot") and replay them on reconnect
+            result, mid = client.subscribe(self.admin_topic, qos=0)
+        except Exception as e:
+            logger.error("MQTT: Error during subscription to %s", self.admin_topic, exc_info=True)
+            return False
+        if result != mqtt.MQTT_ERR_SUCCESS:
+            logger.warning("MQTT: Failed to subscribe to admin topic %s (Error code: %s)", self.admin_topic, result)
+            return False
+        self._admin_subscribed = True
+        logger.info("MQTT: Subscribed to admin topic: %s", self.admin_topic)
+        return True
 
     def _create_client(self) -> mqtt.Client:
-        client_id = f"ratsensor-{self.device_id}-{random.randint(100, 999)}"
+        if self.config.mqtt_persistent_session:
+            # A persistent session is keyed by client ID, so it must be stable across restarts
+            client_id = f"ratsensor-{self.device_id}"
+        else:
+            client_id = f"ratsensor-{self.device_id}-{random.randint(100, 999)}"
         logger.debug(f"MQTT: Creating client with ID: {client_id}")
-        client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id=client_id)
+        # clean_session=False: the broker keeps our subscriptions and queued QoS>0
+        # messages across reconnects instead of starting from scratch each time
+        if self.config.mqtt_protocol_v5:
+            # v5 has no clean_session; session handling is passed to connect() instead
+            client = mqtt.Client(
+                mqtt.CallbackAPIVersion.VERSION2,
+                client_id=client_id,
+                protocol=mqtt.MQTTv5,
+            )
+        else:
+            client = mqtt.Client(
+                mqtt.CallbackAPIVersion.VERSION2,
+                client_id=client_id,
+                clean_session=not self.config.mqtt_persistent_session,
+            )
         client.on_connect = self._on_connect
         client.on_disconnect = self._on_disconnect
         if self.admin_topic:
             client.on_message = self._on_message
 
+        # After a drop, paho's network thread does the reconnecting; keep it on the
+        # configured backoff range (_connection_loop only handles the first connection)
+        client.reconnect_delay_set(
+            min_delay=max(1, int(self.config.mqtt_initial_retry_delay)),
+            max_delay=max(1, int(self.config.mqtt_max_retry_delay)),
+        )
+
+        # Let QoS>0 publishes queue inside paho (bounded) instead of failing while acks are pending
+        client.max_inflight_messages_set(20)
+        client.max_queued_messages_set(1000)
+
         if self.config.mqtt_user and self.config.mqtt_pass:
             client.username_pw_set(self.config.mqtt_user, self.config.mqtt_pass)
             logger.info("MQTT: Using authentication.")
 
         # Configure LWT (Last Will and Testament) - Optional but good practice
-        lwt_topic = f"status/{self.device_id}"
-        lwt_payload = json.dumps({"status": "offline", "reason": "unexpected_disconnect"})
-        client.will_set(lwt_topic, payload=lwt_payload, qos=1, retain=True)
-        logger.info(f"MQTT: LWT configured on topic {lwt_topic}")
+        client.will_set(self.status_topic, payload=self._lwt_payload, qos=1, retain=True)
+        logger.info(f"MQTT: LWT configured on topic {self.status_topic}")
 
         return client
 
+    def _connect_client(self) -> None:
+        if not self.config.mqtt_protocol_v5:
+            self.client.connect(self.config.mqtt_broker, self.config.mqtt_port, self.config.mqtt_keepalive)
+            return
+        properties = Properties(PacketTypes.CONNECT)
+        if self.config.mqtt_persistent_session:
+            # A v5 session ends at disconnect unless it is given an expiry
+            properties.SessionExpiryInterval = 86400
+        self.client.connect(
+            self.config.mqtt_broker, self.config.mqtt_port, self.config.mqtt_keepalive,
+            clean_start=not self.config.mqtt_persistent_session,
+            properties=properties,
+        )
+
+    def _topic_alias(self, topic: str) -> Tuple[str, Optional[Properties]]:
+        """Topic and PUBLISH properties to send with. Caller holds self._lock."""
+        alias = self._topic_alias_ids.get(topic)
+        if not self._use_topic_aliases or alias is None or alias > self._topic_alias_max:
+            return topic, None
+        properties = Properties(PacketTypes.PUBLISH)
+        properties.TopicAlias = alias
+        if topic in self._aliased_topics:
+            return "", properties # Broker already maps this alias to the topic
+        self._aliased_topics.add(topic)
+        return topic, properties
+
+    def _bump_retry_delay(self) -> None:
+        """Grow the retry delay and schedule the next attempt that far from now.
+
+        Decorrelated jitter: next delay is random between the base and factor x the last one.
+
+        Devices that lost the same broker spread out instead of retrying in lockstep,
+        and the delay stays within [initial, max] rather than creeping past max.
+        """
+        base = self.config.mqtt_initial_retry_delay
+        upper = max(base, self._current_retry_delay * self.config.mqtt_retry_backoff_factor)
+        self._current_retry_delay = min(self.config.mqtt_max_retry_delay, random.uniform(base, upper))
+        self._next_attempt_monotonic = time.monotonic() + self._current_retry_delay
+
+    def _handle_connect_failure(self) -> None:
+        """Common cleanup after a failed attempt: back off and stop paho's network loop."""
+        self._is_connected = False
+        self._paho_reconnects = False
+        self._bump_retry_delay()
+        if self.client:
+            # connect() may have failed after loop_start(), or the loop may not be running
+            try:
+                self.client.loop_stop()
+            except Exception:
+                pass
+        self._connect_event.set() # Release connect() if it is still waiting
+
     def _connection_loop(self):
         """Background thread to manage connection and process messages."""
         while not self._stop_event.is_set():
-            with self._lock:
-                is_connected_state = self._is_connected
-
-            if not is_connected_state:
+            if not self._is_connected and not self._paho_reconnects:
                 now = time.monotonic()
-                if now - self._last_connection_attempt_time >= self._current_retry_delay:
-                    self._last_connection_attempt_time = now
-                    logger.info(f"MQTT: Attempting connection (Retry delay: {self._current_retry_delay:.1f}s)...")
+                if now >= self._next_attempt_monotonic:
+                    # A failed attempt reschedules from its end in _bump_retry_delay()
+                    self._next_attempt_monotonic = now + self._current_retry_delay
+                    logger.info("MQTT: Attempting connection (Retry delay: %.1fs)...", self._current_retry_delay)
+                    self._connect_event.clear()
                     try:
                         if self.client:
-                            # Clean up old client resources if reconnecting
+                            # Reuse the same client: its settings and any QoS>0 messages
+                            # still queued inside paho carry over to the new connection
                             try:
                                 self.client.loop_stop()
                             except: pass # Ignore errors stopping non-running loop
-                            try:
-                                self.client.disconnect()
-                            except: pass # Ignore errors disconnecting non-connected client
+                        else:
+                            self.client = self._create_client()
 
-                        self.client = self._create_client()
-                        self.client.connect(self.config.mqtt_broker, self.config.mqtt_port, 60)
+                        self._connect_client()
                         self.client.loop_start()
 
-                        # Wait a short moment to see if on_connect gets called
-                        connect_start_time = time.monotonic()
-                        while time.monotonic() - connect_start_time < 5 and not self.is_connected():
-                            time.sleep(0.1)
+                        # Block until _on_connect reports the CONNACK (either way), up to 5s
+                        self._connect_event.wait(timeout=5)
 
-                        if not self.is_connected():
+                        if not self._is_connected:
                             logger.warning("MQTT: Connection attempt failed or timed out.")
-                            # Increase backoff delay
-                            self._current_retry_delay = min(
-                                self._current_retry_delay * self.config.mqtt_retry_backoff_factor,
-                                self.config.mqtt_max_retry_delay
-                            )
-                            # Add jitter
-                            self._current_retry_delay += random.uniform(0, 5)
-                            # Stop the loop in case connect failed but loop_start was called
-                            try:
-                                self.client.loop_stop()
-                            except: pass
-
+                            self._handle_connect_failure()
 
                     except (ConnectionRefusedError, OSError) as e:
-                        logger.error(f"MQTT: Connection error: {e}")
-                        self._is_connected = False
-                        # Increase backoff delay
-                        self._current_retry_delay = min(
-                            self._current_retry_delay * self.config.mqtt_retry_backoff_factor,
-                            self.config.mqtt_max_retry_delay
-                        )
-                        self._current_retry_delay += random.uniform(0, 5) # Jitter
-                        if self.client:
-                            try: self.client.loop_stop()
-                            except: pass
+                        logger.error("MQTT: Connection error: %s", e)
+                        self._handle_connect_failure()
                     except Exception as e:
-                        logger.error(f"MQTT: Unexpected error during connection attempt: {e}", exc_info=True)
-                        self._is_connected = False
-                        # Increase backoff delay (as above)
-                        self._current_retry_delay = min(
-                            self._current_retry_delay * self.config.mqtt_retry_backoff_factor,
-                            self.config.mqtt_max_retry_delay
-                        )
-                        self._current_retry_delay += random.uniform(0, 5) # Jitter
-                        if self.client:
-                            try: self.client.loop_stop()
-                            except: pass
+                        logger.error("MQTT: Unexpected error during connection attempt: %s", e, exc_info=True)
+                        self._handle_connect_failure()
+                else:
+                    # Not due yet: sleep until it is (wakes at once on disconnect())
+                    self._stop_event.wait(self._next_attempt_monotonic - now)
             else:
-                # Connected, sleep for a bit before checking again
-                time.sleep(1)
+                # Connected, or paho is reconnecting after a drop; its own thread handles
+                # traffic, just check in now and then
+                if self._stop_event.wait(timeout=5):
+                    break
 
         # Loop exited (stop_event set)
         logger.info("MQTT connection loop stopped.")
         if self.client:
             try:
                 # Publish online status false on graceful shutdown
-                lwt_topic = f"status/{self.device_id}"
-                lwt_payload = json.dumps({"status": "offline", "reason": "shutdown"})
-                self.client.publish(lwt_topic, payload=lwt_payload, qos=1, retain=True)
+                self.client.publish(self.status_topic, payload=self._shutdown_payload, qos=1, retain=True)
                 time.sleep(0.5) # Allow time for publish
                 self.client.loop_stop()
                 self.client.disconnect()
                 logger.info("MQTT client disconnected and loop stopped.")
             except Exception as e:
                 logger.error(f"MQTT: Error during final disconnect: {e}", exc_info=True)
-        with self._lock:
-            self._is_connected = False
+        self._is_connected = False
 
 
     # --- DataPublisher Interface ---
@@ -207,12 +345,15 @@ class MqttAdapter(DataPublisher, AdminCommandListener):
             return True
 
         logger.info("Starting MQTT connection management thread...")
+        if self.admin_topic and self._admin_pool is None:
+            self._admin_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="mqtt-admin")
         self._stop_event.clear()
+        self._connect_event.clear()
         self._mqtt_thread = threading.Thread(target=self._connection_loop, daemon=True)
         self._mqtt_thread.start()
 
-        # Give it a moment to try the first connection
-        time.sleep(2)
+        # Wait for the first attempt to resolve; returns as soon as CONNACK arrives
+        self._connect_event.wait(timeout=5.0)
         return self.is_connected() # Return initial connection status
 
     def disconnect(self) -> None:
@@ -226,9 +367,13 @@ class MqttAdapter(DataPublisher, AdminCommandListener):
         self._mqtt_thread = None
         # Final disconnect happens within the loop when stop_event is set
 
+        # Don't wait: the reboot handler itself calls disconnect() from a pool thread
+        if self._admin_pool:
+            self._admin_pool.shutdown(wait=False, cancel_futures=True)
+            self._admin_pool = None
+
     def is_connected(self) -> bool:
-        with self._lock:
-            return self._is_connected
+        return self._is_connected
 
     def publish_sensor_data(self, data: SensorData) -> bool:
         return self._publish(self.sensor_topic, data)
@@ -236,31 +381,48 @@ class MqttAdapter(DataPublisher, AdminCommandListener):
     def publish_info_data(self, data: SystemInfo) -> bool:
         return self._publish(self.info_topic, data)
 
-    def _publish(self, topic: str, data: Union[SensorData, SystemInfo]) -> bool:
-        if not self.is_connected() or not self.client:
-            logger.debug(f"MQTT: Cannot publish to {topic}, not connected.")
-            return False
-
+    def publish_combined(self, sensor_data: SensorData, sys_info: SystemInfo) -> bool:
+        # timestamp/device_id are shared, so the nested part only carries the metrics
+        combined = _payload_dict(sensor_data)
+        combined["system"] = {
+            name: getattr(sys_info, name)
+            for name in _PAYLOAD_FIELDS[SystemInfo] if name not in combined
+        }
+        if sys_info.timestamp != sensor_data.timestamp:
+            # Reused while offline: say when the metrics were actually read
+            combined["system"]["timestamp"] = sys_info.timestamp
+        return self._publish(self.sensor_topic, combined)
+
+    def _publish(self, topic: str, data: Union[SensorData, SystemInfo, dict]) -> bool:
         try:
-            # Use dataclasses.asdict for clean JSON conversion
-            payload = json.dumps(asdict(data), ensure_ascii=False)
-            msg_info = self.client.publish(topic, payload, qos=0) # Use QoS 0 for sensor data
+            payload = _encode_payload(data if isinstance(data, dict) else _payload_dict(data))
+            with self._lock:
+                # Checked and appended under the lock so _on_connect cannot flush in between
+                buffered = not self._is_connected or not self.client
+                if buffered:
+                    self._pending.append((topic, payload))
+                else:
+                    publish_topic, properties = self._topic_alias(topic)
+            if buffered:
+                logger.debug("MQTT: Not connected, buffered message for %s.", topic)
+                return False
+            msg_info = self.client.publish(publish_topic, payload, qos=self.config.mqtt_publish_qos, properties=properties)
             # msg_info.wait_for_publish(timeout=5) # Optional: wait for ack for QoS > 0
             if msg_info.rc == mqtt.MQTT_ERR_SUCCESS:
-                logger.debug(f"MQTT: Published to {topic}: {payload}")
+                # Checked first so a payload is never formatted for a disabled level
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("MQTT: Published to %s: %s", topic, payload)
                 return True
             else:
-                logger.warning(f"MQTT: Failed to publish to {topic} (rc={msg_info.rc})")
+                logger.warning("MQTT: Failed to publish to %s (rc=%s)", topic, msg_info.rc)
                 # If publish fails, could indicate connection issue
-                if msg_info.rc in [mqtt.MQTT_ERR_NO_CONN, mqtt.MQTT_ERR_CONN_LOST]:
-                     with self._lock:
-                         self._is_connected = False # Mark as disconnected
+                if msg_info.rc in (mqtt.MQTT_ERR_NO_CONN, mqtt.MQTT_ERR_CONN_LOST):
+                     self._is_connected = False # Mark as disconnected
                 return False
         except Exception as e:
-            logger.error(f"MQTT: Error publishing to {topic}: {e}", exc_info=True)
+            logger.error("MQTT: Error publishing to %s: %s", topic, e, exc_info=logger.isEnabledFor(logging.DEBUG))
             # Assume connection lost on publish error
-            with self._lock:
-                self._is_connected = False
+            self._is_connected = False
             return False
 
     # --- AdminCommandListener Interface ---
@@ -274,20 +436,11 @@ class MqttAdapter(DataPublisher, AdminCommandListener):
         logger.info(f"Registering admin command handler for topic {self.admin_topic}.")
         self._admin_handler = handler
 
-        # If already connected, subscribe now. Otherwise, it happens in _on_connect.
-        if self.is_connected() and self.client:
-             try:
-                 result, mid = self.client.subscribe(self.admin_topic, qos=1)
-                 if result == mqtt.MQTT_ERR_SUCCESS:
-                     logger.info(f"MQTT: Subscribed to admin topic: {self.admin_topic}")
-                     return True
-                 else:
-                     logger.warning(f"MQTT: Failed to subscribe to admin topic {self.admin_topic} (Error code: {result})")
-                     return False
-             except Exception as e:
-                 logger.error(f"MQTT: Error during immediate subscription to {self.admin_topic}", exc_info=True)
-                 return False
-        return True # Handler registered, subscription will happen on connect
+        # _on_connect subscribes on every CONNACK; only a stop_listening() on the
+        # current connection leaves us unsubscribed here
+        if self.is_connected() and self.client and not self._admin_subscribed:
+            return self._subscribe_admin(self.client)
+        return True # Handler registered, subscription happens on connect
 
     def stop_listening(self) -> None:
         """Unregisters handler and unsubscribes."""
@@ -297,6 +450,7 @@ class MqttAdapter(DataPublisher, AdminCommandListener):
                 self.client.unsubscribe(self.admin_topic)
             except Exception as e:
                 logger.error(f"MQTT: Error unsubscribing from {self.admin_topic}", exc_info=True)
+        self._admin_subscribed = False
         self._admin_handler = None
         logger.info("Admin command handler unregistered.")
 
@@ -38,20 +38,37 @@ from ratsensor.core.ports import SensorReader
 
 logger = logging.getLogger(__name__)
 
+# adafruit_dht only starts a new measurement if >2 s have passed since the last one;
+# calls inside that window silently return the previous (possibly stale) values.
+DHT_MIN_INTERVAL = 2.0 # seconds
 
 class HardwareSensorReader(SensorReader):
     # Removed i2c_bus_num as busio typically handles the default bus
-    def __init__(self, device_id: str, dht_pin: int = 14):
+    def __init__(self, device_id: str, dht_pin: int = 14, cache_ttl: float = 0):
         self._device_id = device_id
+        # Last good reading per sensor as (time.monotonic(), values), served for up to
+        # cache_ttl seconds when a read fails so transient errors don't publish empty fields
+        self.cache_ttl = cache_ttl
+        self._last_good = {}
+        self._failed_reads = {"DHT22": 0, "LTR390": 0}
         # Store the pin number provided by config
         self.dht_pin_number = dht_pin
         # These will hold the initialized sensor objects
         self.i2c: Optional[busio.I2C] = None
         self.ltr: Optional[adafruit_ltr390.LTR390] = None
         self.dht: Optional[adafruit_dht.DHTBase] = None # Use base class for typing
+        # Result of the last DHT22 measurement, returned as-is within DHT_MIN_INTERVAL
+        self._last_dht_read_monotonic = float("-inf")
+        self._last_dht_result = {"temperature": None, "humidity": None}
+        # lux = raw ALS count * this; None falls back to the driver's .lux
+        self._lux_factor: Optional[float] = None
 
         if not HARDWARE_AVAILABLE:
             raise RuntimeError("Hardware libraries not available or platform not supported. Cannot instantiate HardwareSensorReader.")
+        # Resolved once: board pins are dynamic attributes, and initialize() can be re-run.
+        # Example: If dht_pin_number is 4, this gets board.D4 (None if the board has no such pin)
+        self._dht_pin_name = f"D{dht_pin}"
+        self._board_pin = getattr(board, self._dht_pin_name, None)
         logger.info("Initialized Hardware Sensor Reader (using Adafruit Blinka/CircuitPython libraries)")
 
     def initialize(self) -> bool:
@@ -65,6 +82,7 @@ class HardwareSensorReader(SensorReader):
             logger.info("I2C bus initialized successfully.")
             try:
                 self.ltr = adafruit_ltr390.LTR390(self.i2c)
+                self._lux_factor = self._read_lux_factor()
                 logger.info("LTR390 sensor initialized successfully.")
             except (ValueError, OSError) as e_ltr:
                 # ValueError can occur if device not found at address
@@ -88,16 +106,16 @@ class HardwareSensorReader(SensorReader):
 
         # --- Initialize DHT22 ---
         try:
-            # Get the board pin object using the pin number from config
-            # Example: If dht_pin_number is 4, this gets board.D4
-            pin_object = getattr(board, f'D{self.dht_pin_number}')
-            logger.info(f"Attempting to initialize DHT22 on pin: {pin_object} (GPIO{self.dht_pin_number})")
+            if self._board_pin is None:
+                # Only the DHT22 is unusable; the LTR390 can still be read
+                raise AttributeError(self._dht_pin_name)
+            logger.info(f"Attempting to initialize DHT22 on pin: {self._board_pin} (GPIO{self.dht_pin_number})")
             # Pass use_pulseio=False for Raspberry Pi (often more reliable)
             # This prevents the OverflowError: unsigned short is greater than maximum
-            self.dht = adafruit_dht.DHT22(pin_object, use_pulseio=False)
-            logger.info(f"DHT22 sensor initialized successfully on pin D{self.dht_pin_number} (use_pulseio=False).")
+            self.dht = adafruit_dht.DHT22(self._board_pin, use_pulseio=False)
+            logger.info(f"DHT22 sensor initialized successfully on pin {self._dht_pin_name} (use_pulseio=False).")
         except AttributeError:
-            logger.error(f"Invalid DHT pin specified: D{self.dht_pin_number} not found in 'board' module.")
+            logger.error(f"Invalid DHT pin specified: {self._dht_pin_name} not found in 'board' module.")
             self.dht = None
             initialized_ok = False
         except RuntimeError as e_dht_rt:
@@ -121,45 +139,52 @@ class HardwareSensorReader(SensorReader):
         if not self.dht:
             # logger.debug("DHT22 read skipped: sensor not initialized.")
             return {"temperature": None, "humidity": None}
-        
-        # Retry mechanism for DHT22 - these sensors are finicky
-        max_retries = 3
-        retry_delay = 0.5  # seconds
-        
-        for attempt in range(max_retries):
+
+        # Inside the driver's window a read would only return the previous values
+        now = time.monotonic()
+        if now - self._last_dht_read_monotonic < DHT_MIN_INTERVAL:
+            return self._last_dht_result
+        self._last_dht_read_monotonic = now
+
+        # Single attempt: a failed read is simply re-sampled on the next sensor cycle
+        result = {"temperature": None, "humidity": None}
+        try:
             try:
-                # Use properties of the adafruit_dht object
+                # One explicit measurement, then the driver's stored values; each public
+                # property would call measure() again on its own
+                self.dht.measure()
+                temperature_c, humidity = self.dht._temperature, self.dht._humidity
+            except AttributeError:
+                # Driver version without measure()/_temperature: use the properties
                 temperature_c = self.dht.temperature
                 humidity = self.dht.humidity
-                # adafruit_dht automatically retries internally to some extent
-                # It will raise RuntimeError if it fails after retries
-                if temperature_c is not None and humidity is not None:
-                     if attempt > 0:
-                         logger.debug(f"DHT22: Successful read on attempt {attempt + 1}")
-                     return {"temperature": round(temperature_c, 1), "humidity": round(humidity, 1)}
-                else:
-                     # This case might be less common with adafruit_dht compared to Adafruit_DHT
-                     logger.warning("DHT22: Read returned None values (unexpected for adafruit_dht).")
-                     if attempt < max_retries - 1:
-                         time.sleep(retry_delay)
-                         continue
-                     return {"temperature": None, "humidity": None}
-            except RuntimeError as e:
-                # This is the expected error for read failures with adafruit_dht (checksum errors, etc.)
-                if attempt < max_retries - 1:
-                    logger.debug(f"DHT22: Attempt {attempt + 1} failed: {e}. Retrying...")
-                    time.sleep(retry_delay)
-                    continue
-                else:
-                    # Final attempt failed
-                    logger.warning(f"DHT22: Failed to get reading after {max_retries} attempts: {e}")
-                    return {"temperature": None, "humidity": None}
-            except Exception as e:
-                logger.error(f"DHT22: Unexpected sensor error during read", exc_info=True)
-                return {"temperature": None, "humidity": None}
-        
-        # Should not reach here, but just in case
-        return {"temperature": None, "humidity": None}
+            if temperature_c is not None and humidity is not None:
+                result = {"temperature": round(temperature_c, 1), "humidity": round(humidity, 1)}
+            else:
+                # This case might be less common with adafruit_dht compared to Adafruit_DHT
+                logger.warning("DHT22: Read returned None values (unexpected for adafruit_dht).")
+        except RuntimeError as e:
+            # This is the expected error for read failures with adafruit_dht (checksum errors, etc.)
+            # Reported once per failure streak by _with_last_good()
+            logger.debug("DHT22: Failed to get reading: %s", e)
+        except Exception as e:
+            logger.error("DHT22: Unexpected sensor error during read: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
+        self._last_dht_result = result
+        return result
+
+    def _read_lux_factor(self) -> Optional[float]:
+        """Lux conversion factor, from gain/resolution read once (we never change them).
+
+        The driver's .lux re-reads both registers over I2C on every call.
+        """
+        try:
+            gain = adafruit_ltr390.Gain.factor[self.ltr.gain]
+            integration = adafruit_ltr390.Resolution.integration[self.ltr.resolution]
+            return 0.6 / (gain * integration) * self.ltr.window_factor
+        except (AttributeError, KeyError) as e:
+            # Older driver versions without the Gain/Resolution tables
+            logger.debug(f"LTR390: Using driver lux calculation ({e}).")
+            return None
 
     def _read_ltr390(self) -> dict:
         if not self.ltr:
@@ -167,7 +192,11 @@ class HardwareSensorReader(SensorReader):
             return {"light": None}
         try:
             # Use the .lux property for ambient light reading
-            lux_value = self.ltr.lux
+            # .light is one 3-byte block read of the ALS data registers
+            if self._lux_factor is not None:
+                lux_value = self.ltr.light * self._lux_factor
+            else:
+                lux_value = self.ltr.lux
             # Note: The working script used ltr.light for ambient_light and ltr.lux for uv_index.
             # ltr.lux is typically the ambient light in Lux.
             # ltr.uvs reads the UV value, and ltr.uvi calculates the UV Index.
@@ -175,22 +204,42 @@ class HardwareSensorReader(SensorReader):
             return {"light": lux_value}
         except (OSError, ValueError) as e:
             # Catch potential I2C communication errors during read
-            logger.error(f"LTR390: I2C communication error during read: {e}")
+            logger.error("LTR390: I2C communication error during read: %s", e)
             # Consider if re-initialization is needed or just skip reading
             return {"light": None}
         except Exception as e:
-            logger.error(f"LTR390: Unexpected error during read", exc_info=True)
+            logger.error("LTR390: Unexpected error during read: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
             return {"light": None}
 
+    def _with_last_good(self, sensor: str, values: dict) -> dict:
+        """Remember a complete reading; for a failed one, return the cached reading if still fresh."""
+        now = time.monotonic()
+        failures = self._failed_reads[sensor]
+        if None not in values.values():
+            if failures:
+                logger.info("%s: Reading recovered after %s failed reads.", sensor, failures)
+                self._failed_reads[sensor] = 0
+            self._last_good[sensor] = (now, values)
+            return values
+
+        self._failed_reads[sensor] = failures + 1
+        cached = self._last_good.get(sensor)
+        fresh = cached is not None and now - cached[0] < self.cache_ttl
+        if failures == 0: # Log the start of a failure streak, not every read in it
+            if fresh:
+                logger.warning("%s: Read failed, reporting the last good reading (%.0fs old).", sensor, now - cached[0])
+            else:
+                logger.warning("%s: Read failed, no recent reading to fall back on.", sensor)
+        return cached[1] if fresh else values
+
     def read_sensors(self) -> SensorData:
-        # This part remains the same, calling the updated internal methods
-        dht_data = self._read_dht22()
-        light_data = self._read_ltr390()
+        dht_data = self._with_last_good("DHT22", self._read_dht22())
+        light_data = self._with_last_good("LTR390", self._read_ltr390())
 
-        # Timestamp and device_id will be set by the core service
+        # Timestamp will be set by the core service
         return SensorData(
             timestamp="", # Placeholder
-            device_id=self._device_id, # Placeholder
+            device_id=self._device_id,
             temperature=dht_data.get("temperature"),
             humidity=dht_data.get("humidity"),
             light=light_data.get("light")
@@ -217,6 +266,7 @@ class HardwareSensorReader(SensorReader):
 
         self.dht = None
         self.ltr = None
+        self._lux_factor = None
         self.i2c = None
         logger.info("Hardware sensor cleanup finished.")
 
@@ -1,14 +1,29 @@
 import random
 import math
 import logging
-from datetime import datetime
+import time
+from typing import List, Optional
 from ratsensor.core.domain import SensorData
 from ratsensor.core.ports import SensorReader
 
 logger = logging.getLogger(__name__)
 
+try:
+    import numpy as np # Optional: only used by read_sensors_batch()
+except ImportError:
+    np = None
+
+# Time-of-day effects only depend on the hour, so precompute one value per hour
+_TIME_TEMP_EFFECT = tuple(1.5 * math.sin((h - 9) * math.pi / 12) for h in range(24))
+_TIME_HUMID_EFFECT = tuple(5.0 * math.sin((h - 3) * math.pi / 12) for h in range(24))
+# Light peaks around 1 PM, scaled 0-1
+_LIGHT_FACTOR = tuple((math.sin((h - 7) * math.pi / 12) + 1) / 2 for h in range(24))
+
 class SimulatedSensorReader(SensorReader):
-    def __init__(self, device_id: str = "simulated-device"):
+    def __init__(self, device_id: str = "simulated-device", seed: Optional[int] = None):
+        # Private generator: independent of the module-level random state, seedable for repeatable runs
+        self._rng = random.Random(seed)
+        self._np_rng = np.random.default_rng(seed) if np is not None else None
         # Base values for simulation
         self.temp_base = 23.5
         self.humid_base = 55.0
@@ -22,31 +37,53 @@ class SimulatedSensorReader(SensorReader):
 
     def read_sensors(self) -> SensorData:
         # --- Temperature & Humidity Simulation ---
-        temperature = self.temp_base + random.uniform(-1.5, 1.5)
+        uniform = self._rng.uniform
+        temperature = self.temp_base + uniform(-1.5, 1.5)
         temp_effect = 0.2 * (temperature - self.temp_base)
-        humidity = self.humid_base + random.uniform(-5.0, 5.0) + temp_effect
+        humidity = self.humid_base + uniform(-5.0, 5.0) + temp_effect
 
         # Add time-based variation
-        hour = datetime.now().hour
-        time_temp_effect = 1.5 * math.sin((hour - 9) * math.pi / 12)
-        time_humid_effect = 5.0 * math.sin((hour - 3) * math.pi / 12)
+        hour = time.localtime().tm_hour # struct_time field, no datetime object
+        time_temp_effect = _TIME_TEMP_EFFECT[hour]
+        time_humid_effect = _TIME_HUMID_EFFECT[hour]
 
         temperature = max(min(temperature + time_temp_effect, 32.0), 18.0)
         humidity = max(min(humidity + time_humid_effect, 95.0), 35.0)
 
         # --- Light Simulation ---
-        time_factor = math.sin((hour - 7) * math.pi / 12) # Peaks around 1 PM
-        normalized_factor = (time_factor + 1) / 2 # Scale 0-1
-        light_level = max(0, int(self.light_base * normalized_factor) + random.randint(-500, 500))
+        normalized_factor = _LIGHT_FACTOR[hour]
+        light_level = max(0, int(self.light_base * normalized_factor) + self._rng.randint(-500, 500))
 
-        # Timestamp and device_id will be set by the core service
+        # Timestamp will be set by the core service
         return SensorData(
             timestamp="", # Placeholder
-            device_id=self._device_id, # Placeholder
+            device_id=self._device_id,
             temperature=round(temperature, 1),
             humidity=round(humidity, 1),
             light=light_level
         )
 
+    def read_sensors_batch(self, n: int) -> List[SensorData]:
+        """Generate n readings at once, for tests and replay/stress workloads.
+
+        Same model as read_sensors(), vectorized with NumPy when it is installed.
+        """
+        if self._np_rng is None:
+            return [self.read_sensors() for _ in range(n)]
+        rng = self._np_rng
+        hour = time.localtime().tm_hour
+
+        temperature = self.temp_base + rng.uniform(-1.5, 1.5, n)
+        humidity = self.humid_base + rng.uniform(-5.0, 5.0, n) + 0.2 * (temperature - self.temp_base)
+        temperature = np.clip(temperature + _TIME_TEMP_EFFECT[hour], 18.0, 32.0).round(1)
+        humidity = np.clip(humidity + _TIME_HUMID_EFFECT[hour], 35.0, 95.0).round(1)
+        light = np.maximum(0, int(self.light_base * _LIGHT_FACTOR[hour]) + rng.integers(-500, 501, n))
+
+        # tolist() yields plain Python floats/ints, so payloads serialize as before
+        return [
+            SensorData(timestamp="", device_id=self._device_id, temperature=t, humidity=h, light=l)
+            for t, h, l in zip(temperature.tolist(), humidity.tolist(), light.tolist())
+        ]
+
     def cleanup(self) -> None:
         logger.debug("Simulated sensor cleanup (no-op).")
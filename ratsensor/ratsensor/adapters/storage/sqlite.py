@@ -1,17 +1,98 @@
 import os
-import sqlite3
 import logging
-from typing import List
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+from itertools import chain
+from operator import attrgetter
+
+try:
+    # Bundles a current SQLite build; Raspberry Pi OS system libraries lag behind
+    import pysqlite3 as sqlite3
+except ImportError:
+    import sqlite3
+from typing import List, Optional, Sequence
 from ratsensor.core.domain import SensorData
 from ratsensor.core.ports import DataStorage
 
 logger = logging.getLogger(__name__)
 
+# Applied once when the connection is opened. WAL + synchronous=NORMAL avoids
+# an fsync per commit, which is what dominates write cost on an SD card.
+# page_size only takes effect on a new database file (it must come before WAL, which
+# writes the header); 4096 matches the SD card's filesystem block size.
+# mmap_size maps up to 64 MB of the file, so reads hit the page cache without read() copies.
+_PRAGMAS = (
+    "PRAGMA page_size=4096",
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-4096",
+    "PRAGMA mmap_size=67108864",
+)
+
+# timestamp is epoch milliseconds. As an INTEGER PRIMARY KEY it aliases the rowid,
+# so rows are keyed on a native integer and no separate index is needed.
+CREATE_TABLE_SQL = (
+    "CREATE TABLE IF NOT EXISTS sensor_readings ("
+    "timestamp INTEGER PRIMARY KEY, "
+    "device_id TEXT NOT NULL, "
+    "temperature REAL, "
+    "humidity REAL, "
+    "light INTEGER)"
+)
+
+# Kept as a constant so sqlite3's statement cache reuses the compiled statement
+INSERT_SQL = (
+    "INSERT OR IGNORE INTO sensor_readings "
+    "(timestamp, device_id, temperature, humidity, light) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+_ROW_GETTER = attrgetter("timestamp_ms", "device_id", "temperature", "humidity", "light")
+_COLUMNS = 5
+
+# Large batches are bound as multi-row INSERTs, one C-API step per chunk instead of
+# per row. Older SQLite builds cap a statement at 999 parameters (199 rows).
+_MULTI_INSERT_MIN_ROWS = 50
+_MULTI_INSERT_MAX_ROWS = 999 // _COLUMNS
+
+@lru_cache(maxsize=8)
+def _multi_insert_sql(row_count: int) -> str:
+    values = ", ".join(["(?, ?, ?, ?, ?)"] * row_count)
+    return INSERT_SQL.rsplit("VALUES", 1)[0] + "VALUES " + values
+
+# Queued by close(): the writer thread finishes what is ahead of it and exits
+_STOP = object()
+# A backlog is drained into one commit up to about this many rows
+_MAX_COALESCED_ROWS = 5000
+
+def _iso_to_epoch_ms(timestamp: str) -> int:
+    """Fallback for readings created without timestamp_ms ('...T...sssZ' format)."""
+    dt = datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%S.%fZ").replace(tzinfo=timezone.utc)
+    return int(dt.timestamp()) * 1000 + dt.microsecond // 1000
+
 class SQLiteStorageAdapter(DataStorage):
-    def __init__(self, db_file_path: str, timeout: float = 10.0):
+    def __init__(self, db_file_path: str, timeout: float = 10.0,
+                 lock_retries: int = 3, lock_retry_delay: float = 0.2,
+                 cached_statements: int = 256, queue_size: int = 64,
+                 max_unsaved_rows: int = 10000):
         self.db_file_path = db_file_path
         self.timeout = timeout
+        self.lock_retries = lock_retries
+        self.lock_retry_delay = lock_retry_delay
+        self.cached_statements = cached_statements
+        self.queue_size = queue_size
+        self.max_unsaved_rows = max_unsaved_rows
+        self._conn: Optional[sqlite3.Connection] = None
         self._initialized = False
+        # Commits run on one background thread fed by this queue, so a slow SD card
+        # or a locked database never stalls the sensor loop
+        self._queue: Optional[queue.Queue] = None
+        self._writer: Optional[threading.Thread] = None
+        # Rows whose commit failed, retried ahead of the next batch (writer thread only)
+        self._unsaved: List[tuple] = []
 
     def initialize(self) -> bool:
         if self._initialized:
@@ -26,63 +107,194 @@ class SQLiteStorageAdapter(DataStorage):
             return False
 
         try:
-            conn = sqlite3.connect(self.db_file_path, timeout=self.timeout)
-            cursor = conn.cursor()
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS sensor_readings (
-                    timestamp TEXT PRIMARY KEY,
-                    device_id TEXT NOT NULL,
-                    temperature REAL,
-                    humidity REAL,
-                    light INTEGER
-                )
-            ''')
-            # Optional: Add index for faster lookups if needed
-            cursor.execute('''
-               CREATE INDEX IF NOT EXISTS idx_timestamp ON sensor_readings (timestamp);
-            ''')
-            conn.commit()
-            conn.close()
+            # Long-lived connection, reused for every save.
+            # isolation_level=None: transactions are managed explicitly (BEGIN/COMMIT)
+            # check_same_thread=False: set up here, then used only by the writer thread
+            self._conn = sqlite3.connect(
+                self.db_file_path,
+                timeout=self.timeout,
+                cached_statements=self.cached_statements,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            cursor = self._conn.cursor()
+            for pragma in _PRAGMAS:
+                cursor.execute(pragma)
+            if self._has_text_timestamp(cursor):
+                self._migrate_text_timestamps(cursor)
+            cursor.execute(CREATE_TABLE_SQL)
+            self._queue = queue.Queue(maxsize=self.queue_size)
+            self._writer = threading.Thread(target=self._writer_loop, name="sqlite-writer", daemon=True)
+            self._writer.start()
             logger.info(f"Database initialized successfully at {self.db_file_path}")
             self._initialized = True
             return True
         except sqlite3.Error as e:
             logger.error(f"Database initialization error: {e}")
+            self.close()
             return False
 
-    def save_sensor_readings(self, readings: List[SensorData]) -> bool:
-        if not self._initialized:
+    @staticmethod
+    def _has_text_timestamp(cursor: sqlite3.Cursor) -> bool:
+        """True if sensor_readings exists with the old ISO-8601 TEXT key."""
+        for _, name, col_type, *_ in cursor.execute("PRAGMA table_info(sensor_readings)"):
+            if name == "timestamp":
+                return col_type.upper() == "TEXT"
+        return False
+
+    def _migrate_text_timestamps(self, cursor: sqlite3.Cursor) -> None:
+        """One-time conversion of an existing TEXT-keyed table to epoch-ms keys."""
+        logger.info("Migrating sensor_readings to integer timestamps...")
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            cursor.execute("ALTER TABLE sensor_readings RENAME TO sensor_readings_old")
+            cursor.execute(CREATE_TABLE_SQL)
+            # julianday() understands the stored 'YYYY-MM-DDTHH:MM:SS.sssZ' strings
+            cursor.execute(
+                "INSERT OR IGNORE INTO sensor_readings "
+                "SELECT CAST(ROUND((julianday(timestamp) - 2440587.5) * 86400000) AS INTEGER), "
+                "device_id, temperature, humidity, light "
+                "FROM sensor_readings_old WHERE julianday(timestamp) IS NOT NULL"
+            )
+            migrated = cursor.rowcount
+            # Dropping the old table also drops its idx_timestamp index
+            cursor.execute("DROP TABLE sensor_readings_old")
+            cursor.execute("COMMIT")
+        except sqlite3.Error:
+            self._rollback()
+            raise
+        logger.info(f"Migrated {migrated} readings to integer timestamps.")
+
+    def save_sensor_readings(self, readings: Sequence[SensorData]) -> bool:
+        """Queue a batch for the writer thread.
+
+        True means the batch was accepted; the commit happens in the background and
+        rows that fail to commit are retried with the next batch.
+        """
+        if not self._initialized or self._queue is None:
             logger.error("Database not initialized, cannot save readings.")
             return False
         if not readings:
             return True # Nothing to save
 
-        insert_data = [
-            (rec.timestamp, rec.device_id, rec.temperature, rec.humidity, rec.light)
-            for rec in readings
-        ]
-
+        # attrgetter builds each row tuple in C, already in INSERT_SQL column order.
+        # Done here so the queued rows are a snapshot the caller may clear right away.
+        insert_data = list(map(_ROW_GETTER, readings))
+        if any(row[0] is None for row in insert_data):
+            insert_data = [
+                row if row[0] is not None else (_iso_to_epoch_ms(rec.timestamp),) + row[1:]
+                for rec, row in zip(readings, insert_data)
+            ]
         try:
-            conn = sqlite3.connect(self.db_file_path, timeout=self.timeout)
-            cursor = conn.cursor()
-            cursor.executemany('''
-                INSERT OR IGNORE INTO sensor_readings
-                (timestamp, device_id, temperature, humidity, light)
-                VALUES (?, ?, ?, ?, ?)
-            ''', insert_data)
-            conn.commit()
-            conn.close()
-            logger.debug(f"Successfully saved {len(readings)} records to database.")
-            return True
-        except sqlite3.OperationalError as e:
-            if "locked" in str(e).lower():
-                logger.warning(f"Database is locked, could not save data this cycle: {e}")
-            else:
-                logger.error(f"Database operational error during save: {e}")
-            return False
-        except sqlite3.Error as e:
-            logger.error(f"Failed to save data to database: {e}")
-            return False
-        except Exception as e:
-            logger.error(f"Unexpected error during database save: {e}", exc_info=True)
+            self._queue.put_nowait(insert_data)
+        except queue.Full:
+            logger.warning("Database writer is %s batches behind; readings kept for the next save.", self.queue_size)
             return False
+        return True
+
+    def _writer_loop(self) -> None:
+        """Single writer: commits queued batches on the one connection until close()."""
+        stopping = False
+        while not stopping:
+            rows = self._queue.get()
+            if rows is _STOP:
+                break
+            # Batches that queued up while the last commit ran share one transaction
+            while len(rows) < _MAX_COALESCED_ROWS:
+                try:
+                    more = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if more is _STOP:
+                    stopping = True
+                    break
+                rows = rows + more
+            self._write(rows)
+        if self._unsaved:
+            # Last attempt for rows left over from failed writes
+            self._write([])
+
+    def _write(self, rows: List[tuple]) -> None:
+        """Commit rows behind any left over from failed writes; keep them all on failure."""
+        if self._unsaved:
+            rows = self._unsaved + rows
+        if self._commit_rows(rows):
+            self._unsaved = []
+            return
+        dropped = len(rows) - self.max_unsaved_rows
+        if dropped > 0:
+            logger.warning("Dropping %s oldest unsaved readings (limit %s).", dropped, self.max_unsaved_rows)
+            rows = rows[dropped:]
+        self._unsaved = rows
+
+    def _commit_rows(self, rows: List[tuple]) -> bool:
+        for attempt in range(self.lock_retries):
+            try:
+                # Whole batch in a single transaction. IMMEDIATE takes the write lock up
+                # front, so contention shows up here (and is retried) rather than mid-insert
+                self._conn.execute("BEGIN IMMEDIATE")
+                self._insert_rows(rows)
+                self._conn.execute("COMMIT")
+                logger.debug("Successfully saved %s records to database.", len(rows))
+                return True
+            except sqlite3.OperationalError as e:
+                self._rollback()
+                if "locked" in str(e).lower():
+                    if attempt < self.lock_retries - 1:
+                        logger.debug("Database is locked, retrying save (attempt %s/%s)...", attempt + 1, self.lock_retries)
+                        time.sleep(self.lock_retry_delay)
+                        continue
+                    logger.warning("Database is locked, could not save data this cycle: %s", e)
+                else:
+                    logger.error("Database operational error during save: %s", e)
+                return False
+            except sqlite3.Error as e:
+                self._rollback()
+                logger.error("Failed to save data to database: %s", e)
+                return False
+            except Exception as e:
+                self._rollback()
+                # Retried with every batch; traceback only at LOG_LEVEL=DEBUG
+                logger.error("Unexpected error during database save: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
+                return False
+        return False
+
+    def _insert_rows(self, rows: List[tuple]) -> None:
+        for start in range(0, len(rows), _MULTI_INSERT_MAX_ROWS):
+            chunk = rows[start:start + _MULTI_INSERT_MAX_ROWS]
+            if len(chunk) >= _MULTI_INSERT_MIN_ROWS:
+                self._conn.execute(_multi_insert_sql(len(chunk)), tuple(chain.from_iterable(chunk)))
+            else:
+                self._conn.executemany(INSERT_SQL, chunk)
+
+    def _rollback(self) -> None:
+        """Roll back a transaction left open by a failed save."""
+        if self._conn is not None and self._conn.in_transaction:
+            try:
+                self._conn.execute("ROLLBACK")
+            except sqlite3.Error as e:
+                logger.error(f"Error rolling back transaction: {e}")
+
+    def close(self) -> None:
+        if self._writer is not None:
+            # Everything queued before the sentinel is still written
+            try:
+                self._queue.put(_STOP, timeout=self.timeout)
+                self._writer.join(timeout=self.timeout * self.lock_retries)
+            except queue.Full:
+                pass
+            if self._writer.is_alive():
+                # Leave the connection to the (daemon) writer rather than close it mid-write
+                logger.error("Database writer did not finish in time; pending readings may be lost.")
+                self._initialized = False
+                return
+            self._writer = None
+            self._queue = None
+        if self._conn is not None:
+            try:
+                self._conn.close()
+                logger.info("Database connection closed.")
+            except sqlite3.Error as e:
+                logger.error(f"Error closing database connection: {e}")
+        self._conn = None
+        self._initialized = False
@@ -0,0 +1,122 @@
+import logging
+import os
+import time
+from typing import Any, Callable, Optional, Tuple
+from ratsensor.core.domain import SystemInfo
+from ratsensor.core.ports import SystemInfoReader
+from ratsensor.adapters.system_info.uptime import format_uptime
+
+logger = logging.getLogger(__name__)
+
+# Linux only: the /proc files plus the kernel's boot-time clock for uptime
+PROCFS_AVAILABLE = (
+    os.path.exists("/proc/stat")
+    and os.path.exists("/proc/meminfo")
+    and hasattr(time, "CLOCK_BOOTTIME")
+)
+
+# The fields we parse sit in the first lines of each file
+_READ_SIZE = 512
+_MEMINFO_KEYS = (b"MemTotal", b"MemFree", b"MemAvailable", b"Buffers", b"Cached")
+
+class ProcfsSystemInfoReader(SystemInfoReader):
+    """System info read straight from /proc, without psutil's per-metric objects.
+
+    Reports the same numbers as PsutilSystemInfoReader: memory from MemTotal/MemAvailable,
+    CPU as busy time since the previous read, disk usage of '/' from statvfs.
+    """
+    def __init__(self, device_id: str, disk_refresh_seconds: float = 600.0):
+        if not PROCFS_AVAILABLE:
+            raise RuntimeError("/proc not available. Cannot instantiate ProcfsSystemInfoReader.")
+        self._device_id = device_id
+        # Disk usage barely moves on the Pi; statvfs it at a lower cadence
+        self.disk_refresh_seconds = disk_refresh_seconds
+        self._disk_percent: Optional[float] = None
+        self._last_disk_check = 0.0
+        # Opened once and read with pread at offset 0: procfs regenerates the content
+        # on each read, so no open/seek/close per cycle
+        self._stat_fd: Optional[int] = None
+        self._meminfo_fd: Optional[int] = None
+        try:
+            self._stat_fd = os.open("/proc/stat", os.O_RDONLY)
+            self._meminfo_fd = os.open("/proc/meminfo", os.O_RDONLY)
+            # Prime the CPU sampler, as psutil.cpu_percent(interval=None) does
+            self._cpu_times = self._read_cpu_times()
+        except Exception:
+            self.close()
+            raise
+        logger.info("Initialized Procfs System Info Reader")
+
+    def _read_cpu_times(self) -> Tuple[int, int]:
+        """(total, idle) jiffies from the aggregate 'cpu' line of /proc/stat."""
+        line = os.pread(self._stat_fd, _READ_SIZE, 0).split(b"\n", 1)[0]
+        # user nice system idle iowait irq softirq steal; guest time is already in user/nice
+        times = [int(value) for value in line.split()[1:9]]
+        return sum(times), times[3] + times[4]
+
+    def _read_cpu_percent(self) -> float:
+        total, idle = self._read_cpu_times()
+        prev_total, prev_idle = self._cpu_times
+        self._cpu_times = (total, idle)
+        delta = total - prev_total
+        if delta <= 0:
+            return 0.0
+        return round((delta - (idle - prev_idle)) / delta * 100, 1)
+
+    def _read_memory_percent(self) -> float:
+        values = {}
+        for line in os.pread(self._meminfo_fd, _READ_SIZE, 0).split(b"\n"):
+            key, _, rest = line.partition(b":")
+            if key in _MEMINFO_KEYS:
+                values[key] = int(rest.split()[0])
+        total = values[b"MemTotal"]
+        available = values.get(b"MemAvailable")
+        if available is None:
+            # Kernels before 3.14 don't report it; estimate it as psutil does there
+            available = values[b"MemFree"] + values.get(b"Buffers", 0) + values.get(b"Cached", 0)
+        return round((total - available) / total * 100, 1)
+
+    def _read_disk_percent(self) -> Optional[float]:
+        """Return disk usage of '/', refreshed at most every disk_refresh_seconds."""
+        now = time.monotonic()
+        if self._disk_percent is None or now - self._last_disk_check >= self.disk_refresh_seconds:
+            st = os.statvfs('/')
+            # Same definition as psutil: used vs. space available to unprivileged users
+            used = (st.f_blocks - st.f_bfree) * st.f_frsize
+            usable = used + st.f_bavail * st.f_frsize
+            self._disk_percent = round(used / usable * 100, 1) if usable else 0.0
+            self._last_disk_check = now
+        return self._disk_percent
+
+    @staticmethod
+    def _read_metric(name: str, read: Callable[[], Any]) -> Any:
+        """One metric failing (e.g. an unexpected /proc format) leaves the others reported."""
+        try:
+            return read()
+        except Exception as e:
+            logger.error("Error reading %s from /proc: %s", name, e, exc_info=logger.isEnabledFor(logging.DEBUG))
+            return None
+
+    def read_system_info(self) -> SystemInfo:
+        disk = self._read_metric("disk usage", self._read_disk_percent)
+        mem = self._read_metric("memory usage", self._read_memory_percent)
+        cpu = self._read_metric("CPU usage", self._read_cpu_percent)
+        uptime_sec = int(time.clock_gettime(time.CLOCK_BOOTTIME))
+        uptime_hum = format_uptime(uptime_sec)
+
+        # Timestamp will be set by the core service
+        return SystemInfo(
+            timestamp="", # Placeholder
+            device_id=self._device_id,
+            disk_percent=disk,
+            memory_percent=mem,
+            cpu_percent=cpu,
+            uptime_seconds=uptime_sec,
+            uptime_human=uptime_hum
+        )
+
+    def close(self) -> None:
+        for fd in (self._stat_fd, self._meminfo_fd):
+            if fd is not None:
+                os.close(fd)
+        self._stat_fd = self._meminfo_fd = None
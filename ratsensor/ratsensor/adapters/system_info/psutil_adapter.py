@@ -1,8 +1,9 @@
 import logging
 import time
-from datetime import timedelta
+from typing import Optional
 from ratsensor.core.domain import SystemInfo
 from ratsensor.core.ports import SystemInfoReader
+from ratsensor.adapters.system_info.uptime import format_uptime
 
 logger = logging.getLogger(__name__)
 
@@ -13,13 +14,34 @@ except ImportError:
     logger.warning("psutil library not found. Real system info reader unavailable.")
     PSUTIL_AVAILABLE = False
 
+# Uptime straight from the kernel clock (Linux): no /proc/stat read per cycle, and
+# unaffected by the wall clock jumping when NTP syncs on a Pi without an RTC
+_CLOCK_BOOTTIME = getattr(time, "CLOCK_BOOTTIME", None)
+
 class PsutilSystemInfoReader(SystemInfoReader):
-    def __init__(self, device_id: str):
+    def __init__(self, device_id: str, disk_refresh_seconds: float = 600.0):
         self._device_id = device_id
+        # Disk usage barely moves on the Pi; statvfs it at a lower cadence
+        self.disk_refresh_seconds = disk_refresh_seconds
+        self._disk_percent: Optional[float] = None
+        self._last_disk_check = 0.0
         if not PSUTIL_AVAILABLE:
             raise RuntimeError("psutil library not available. Cannot instantiate PsutilSystemInfoReader.")
+        # Prime the CPU sampler: later non-blocking calls report usage since the previous call.
+        # The first reading after startup only covers the time since this call (may be 0.0).
+        psutil.cpu_percent(interval=None)
+        # Boot time never changes while we run; only needed where CLOCK_BOOTTIME is missing
+        self._boot_time = None if _CLOCK_BOOTTIME is not None else psutil.boot_time()
         logger.info("Initialized Psutil System Info Reader")
 
+    def _read_disk_percent(self) -> Optional[float]:
+        """Return disk usage of '/', refreshed at most every disk_refresh_seconds."""
+        now = time.monotonic()
+        if self._disk_percent is None or now - self._last_disk_check >= self.disk_refresh_seconds:
+            self._disk_percent = round(psutil.disk_usage('/').percent, 1)
+            self._last_disk_check = now
+        return self._disk_percent
+
     def read_system_info(self) -> SystemInfo:
         disk = None
         mem = None
@@ -27,23 +49,23 @@ class PsutilSystemInfoReader(SystemInfoReader):
         uptime_sec = None
         uptime_hum = None
         try:
-            disk = round(psutil.disk_usage('/').percent, 1)
+            disk = self._read_disk_percent()
             mem = round(psutil.virtual_memory().percent, 1)
-            # Use a short interval for CPU, but be mindful of impact
-            cpu = round(psutil.cpu_percent(interval=0.1), 1)
-            boot_time = psutil.boot_time()
-            current_time = time.time()
-            uptime_sec = int(current_time - boot_time)
-            delta = timedelta(seconds=uptime_sec)
-            uptime_hum = str(delta).split('.')[0] # Remove microseconds
+            # Non-blocking: usage since the previous read (i.e. over the last read interval)
+            cpu = round(psutil.cpu_percent(interval=None), 1)
+            if _CLOCK_BOOTTIME is not None:
+                uptime_sec = int(time.clock_gettime(_CLOCK_BOOTTIME))
+            else:
+                uptime_sec = int(time.time() - self._boot_time)
+            uptime_hum = format_uptime(uptime_sec)
 
         except Exception as e:
-            logger.error(f"Error getting system info via psutil: {e}", exc_info=True)
+            logger.error("Error getting system info via psutil: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
 
-        # Timestamp and device_id will be set by the core service
+        # Timestamp will be set by the core service
         return SystemInfo(
             timestamp="", # Placeholder
-            device_id=self._device_id, # Placeholder
+            device_id=self._device_id,
             disk_percent=disk,
             memory_percent=mem,
             cpu_percent=cpu,
@@ -11,10 +11,10 @@ class SimulatedSystemInfoReader(SystemInfoReader):
 
     def read_system_info(self) -> SystemInfo:
         logger.debug("Reading simulated system info.")
-        # Timestamp and device_id will be set by the core service
+        # Timestamp will be set by the core service
         return SystemInfo(
             timestamp="", # Placeholder
-            device_id=self._device_id, # Placeholder
+            device_id=self._device_id,
             disk_percent=50.0,
             memory_percent=60.0,
             cpu_percent=25.0,
@@ -0,0 +1,9 @@
+def format_uptime(seconds: int) -> str:
+    """Same text as str(timedelta(seconds=...)), e.g. '2 days, 3:04:05', without the timedelta."""
+    days, rem = divmod(seconds, 86400)
+    hours, rem = divmod(rem, 3600)
+    minutes, secs = divmod(rem, 60)
+    hms = f"{hours}:{minutes:02d}:{secs:02d}"
+    if days:
+        return f"{days} day{'s' if days != 1 else ''}, {hms}"
+    return hms
@@ -1,15 +1,23 @@
-from dataclasses import dataclass
+import sys
+from dataclasses import dataclass, field
 from typing import Optional
 
-@dataclass
+# __slots__ instead of a per-instance __dict__: smaller instances (readings sit in the
+# storage buffer until a flush) and faster attribute access. Needs Python 3.10+.
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(**_SLOTS)
 class SensorData:
     timestamp: str 
     device_id: str
     temperature: Optional[float] = None
     humidity: Optional[float] = None
     light: Optional[int] = None
+    # Same instant as `timestamp` as epoch milliseconds, used as the storage key.
+    # Not part of the published payload.
+    timestamp_ms: Optional[int] = field(default=None, metadata={"publish": False})
 
-@dataclass
+@dataclass(**_SLOTS)
 class SystemInfo:
     timestamp: str 
     device_id: str
@@ -19,11 +27,13 @@ class SystemInfo:
     uptime_seconds: Optional[int] = None
     uptime_human: Optional[str] = None
 
-@dataclass
+@dataclass(**_SLOTS)
 class AppConfig:
     # Intervals
     read_interval_seconds: int = 30 
-    db_save_interval_reads: int = 5 
+    db_save_interval_reads: int = 500 # Flush when this many readings are buffered...
+    db_save_interval_seconds: int = 600 # ...or this many seconds after the last save
+    db_buffer_max_reads: int = 10000 # Readings kept while saves fail; oldest dropped beyond this
 
     # MQTT
     mqtt_broker: Optional[str] = None
@@ -37,11 +47,26 @@ class AppConfig:
     mqtt_initial_retry_delay: int = 15
     mqtt_max_retry_delay: int = 300
     mqtt_retry_backoff_factor: float = 2.0
+    mqtt_keepalive: int = 45 # Seconds; a dead connection is noticed after ~1.5x this
+    mqtt_publish_qos: int = 1 # QoS for sensor/info publishes
+    mqtt_persistent_session: bool = True # clean_session=False with a stable client ID
+    mqtt_offline_buffer_size: int = 200 # Messages kept while disconnected, sent on reconnect
+    mqtt_protocol_v5: bool = False # MQTT v5, enables topic aliases for QoS 0 publishes
+
+    # Publish filtering: a message is only sent when a value moved by more than its
+    # delta, or as a heartbeat every N read intervals (1 = publish every reading)
+    publish_delta_temperature: float = 0.3
+    publish_delta_humidity: float = 1.0
+    publish_delta_light: int = 50
+    publish_delta_system_percent: float = 1.0 # disk/memory/cpu percent
+    publish_heartbeat_intervals: int = 10
+    publish_combined_payload: bool = False # One message on the sensor topic, system info nested
 
     # Paths
     device_id_file: str = "/etc/ratsensor/device_id.json"
     database_file: str = "/var/lib/ratsensor/sensor_data.db"
     log_file: str = "/var/log/ratsensor/ratsensor.log"
+    log_level: str = "INFO" # DEBUG also logs tracebacks for errors that can repeat every cycle
 
     # Simulation
     simulation_mode: bool = False
@@ -49,3 +74,10 @@ class AppConfig:
     # Hardware specific
     dht_pin: int = 14
     i2c_bus_number: int = 1
+    # Failed reads reuse the last good value up to this old (0 = off). Unset means two
+    # read intervals, so the value from the previous cycle is always still usable.
+    sensor_cache_ttl_seconds: Optional[int] = None
+
+    def __post_init__(self):
+        if self.sensor_cache_ttl_seconds is None:
+            self.sensor_cache_ttl_seconds = 2 * self.read_interval_seconds
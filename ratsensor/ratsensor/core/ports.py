@@ -1,6 +1,6 @@
 # ratsensor/core/ports.py
 import abc
-from typing import List, Callable, Optional
+from typing import Callable, Optional, Sequence
 from ratsensor.core.domain import SensorData, SystemInfo, AppConfig
 
 # --- Driven Ports (Core uses these) ---
@@ -8,7 +8,7 @@ from ratsensor.core.domain import SensorData, SystemInfo, AppConfig
 class SensorReader(abc.ABC):
     @abc.abstractmethod
     def read_sensors(self) -> SensorData:
-        """Reads temperature, humidity, and light."""
+        """Reads temperature, humidity, and light, with device_id already set."""
         pass
 
     def initialize(self) -> bool:
@@ -22,7 +22,11 @@ class SensorReader(abc.ABC):
 class SystemInfoReader(abc.ABC):
     @abc.abstractmethod
     def read_system_info(self) -> SystemInfo:
-        """Reads system metrics."""
+        """Reads system metrics, with device_id already set."""
+        pass
+
+    def close(self) -> None:
+        """Optional: Release reader resources (e.g., open file descriptors)."""
         pass
 
 class DataPublisher(abc.ABC):
@@ -51,6 +55,12 @@ class DataPublisher(abc.ABC):
         """Publish system info data."""
         pass
 
+    def publish_combined(self, sensor_data: SensorData, sys_info: SystemInfo) -> bool:
+        """Optional: Publish both as one message. Defaults to two separate publishes."""
+        sensor_ok = self.publish_sensor_data(sensor_data)
+        info_ok = self.publish_info_data(sys_info)
+        return sensor_ok and info_ok
+
 class DataStorage(abc.ABC):
     @abc.abstractmethod
     def initialize(self) -> bool:
@@ -58,8 +68,15 @@ class DataStorage(abc.ABC):
         pass
 
     @abc.abstractmethod
-    def save_sensor_readings(self, readings: List[SensorData]) -> bool:
-        """Save a batch of sensor readings."""
+    def save_sensor_readings(self, readings: Sequence[SensorData]) -> bool:
+        """Save a batch of sensor readings (any sized, re-iterable sequence, e.g. list or deque).
+
+        May write in the background; True then means the batch was accepted.
+        """
+        pass
+
+    def close(self) -> None:
+        """Optional: Release storage resources (e.g., open connections)."""
         pass
 
 class DeviceIdentityProvider(abc.ABC):
@@ -1,8 +1,11 @@
+import sys
 import time
 import logging
 import json
-from datetime import datetime, timezone
-from typing import List, Optional
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, Optional
 
 from ratsensor.core.domain import SensorData, SystemInfo, AppConfig
 from ratsensor.core.ports import (
@@ -13,6 +16,19 @@ from ratsensor.core.ports import (
 
 logger = logging.getLogger(__name__)
 
+def _values_changed(current, previous, deltas) -> bool:
+    """True if any field moved by more than its delta, or appeared/disappeared."""
+    if previous is None:
+        return True
+    for name, delta in deltas:
+        new, old = getattr(current, name), getattr(previous, name)
+        if new is None or old is None:
+            if new is not old:
+                return True
+        elif abs(new - old) > delta:
+            return True
+    return False
+
 class SensorMonitoringService:
     def __init__(
         self,
@@ -24,6 +40,7 @@ class SensorMonitoringService:
         identity_provider: DeviceIdentityProvider,
         command_executor: CommandExecutor,
         admin_listener: Optional[AdminCommandListener] = None,
+        on_cycle: Optional[Callable[[], None]] = None,
     ):
         self.config = config
         self.sensor_reader = sensor_reader
@@ -33,11 +50,38 @@ class SensorMonitoringService:
         self.identity_provider = identity_provider
         self.command_executor = command_executor
         self.admin_listener = admin_listener
+        # Called at the end of every loop iteration (e.g. periodic log flushing)
+        self.on_cycle = on_cycle
 
         self.device_id: str = "unknown"
         self._running = False
-        self._sensor_data_buffer: List[SensorData] = []
-        self._measurement_count = 0
+        # shutdown() runs from run() and again from main()'s finally; only the first call acts
+        self._shut_down = False
+        # Set by stop() to wake the main loop out of its inter-read wait
+        self._stop_event = threading.Event()
+        # Sensor and system-info reads are independent blocking calls; run them side by side
+        self._read_pool: Optional[ThreadPoolExecutor] = None
+        # Bounded so a long storage outage cannot grow memory without limit; the oldest
+        # readings are dropped first once it is full
+        self._sensor_data_buffer: Deque[SensorData] = deque(
+            maxlen=max(config.db_buffer_max_reads, config.db_save_interval_reads))
+        self._last_save_time = time.monotonic()
+        # Last successfully published messages and per-type change thresholds
+        self._last_published_sensor: Optional[SensorData] = None
+        # Most recent system info read (reused while the publisher is down)
+        self._sys_info: Optional[SystemInfo] = None
+        self._last_published_info: Optional[SystemInfo] = None
+        self._publish_cycle = 0
+        self._sensor_deltas = (
+            ("temperature", config.publish_delta_temperature),
+            ("humidity", config.publish_delta_humidity),
+            ("light", config.publish_delta_light),
+        )
+        # uptime is left out on purpose: it changes every reading
+        self._info_deltas = tuple(
+            (name, config.publish_delta_system_percent)
+            for name in ("disk_percent", "memory_percent", "cpu_percent")
+        )
 
     def _handle_admin_command(self, command: str):
         """Callback passed to the AdminCommandListener."""
@@ -46,9 +90,10 @@ class SensorMonitoringService:
             logger.warning("Executing reboot command...")
             time.sleep(1) # Give time for log message to flush
             try:
-                self.publisher.disconnect() # Attempt graceful disconnect
+                # Unsubscribe while still connected, so the session doesn't keep the admin topic
                 if self.admin_listener:
                     self.admin_listener.stop_listening()
+                self.publisher.disconnect() # Attempt graceful disconnect
             except Exception as e:
                 logger.error(f"Error during pre-reboot cleanup: {e}")
             self.command_executor.execute_reboot()
@@ -63,6 +108,8 @@ class SensorMonitoringService:
             if not self.device_id or self.device_id.startswith("temp-"):
                 logger.critical("Failed to get a persistent device ID.")
                 return False
+            # Same string object as the readers' copy: equality checks short-circuit on identity
+            self.device_id = sys.intern(self.device_id)
             logger.info(f"Using Device ID: {self.device_id}")
 
             if not self.sensor_reader.initialize():
@@ -95,103 +142,179 @@ class SensorMonitoringService:
             logger.critical("Service initialization failed. Exiting.")
             return
 
-        logger.info(f"Starting main loop. Read interval: {self.config.read_interval_seconds}s, DB save interval: {self.config.db_save_interval_reads} reads.")
+        logger.info(f"Starting main loop. Read interval: {self.config.read_interval_seconds}s, DB save interval: {self.config.db_save_interval_reads} reads or {self.config.db_save_interval_seconds}s.")
         self._running = True
+        self._stop_event.clear()
+        self._read_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ratsensor-read")
+        self._last_save_time = time.monotonic()
+        # Reads follow a fixed monotonic schedule, so wait overshoot and slow reads
+        # don't accumulate into drift of the sampling phase
+        next_read = time.monotonic()
 
         while self._running:
             loop_start_time = time.monotonic()
+            next_read += self.config.read_interval_seconds
 
             try:
                 # 1. Ensure Publisher Connection (handled by publisher adapter)
                 # The adapter should manage its connection state and retries.
                 # We just check if it's ready before attempting to publish.
 
-                # 2. Read Sensor Data
-                timestamp_now = datetime.now(timezone.utc)
-                timestamp_iso = timestamp_now.isoformat(timespec='milliseconds').replace('+00:00', 'Z')
-
-                sensor_data = self.sensor_reader.read_sensors()
+                # 2. Read Sensor Data and System Info concurrently
+                # (iteration time becomes the slower of the two, not their sum)
+                # One clock read feeds both the storage key and the ISO string (no datetime object)
+                timestamp_ms = time.time_ns() // 1_000_000
+                seconds, millis = divmod(timestamp_ms, 1000)
+                timestamp_iso = f"{time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(seconds))}.{millis:03d}Z"
+
+                connected = self.publisher.is_connected()
+                sensor_future = self._read_pool.submit(self.sensor_reader.read_sensors)
+                # System info is only published, never stored: while disconnected the read is
+                # skipped and the last result reused, so no offline-buffer slots go to stale metrics
+                sys_info_future = None
+                if connected or self._sys_info is None:
+                    sys_info_future = self._read_pool.submit(self.sys_info_reader.read_system_info)
+
+                sensor_data = sensor_future.result()
                 sensor_data.timestamp = timestamp_iso # Ensure consistent timestamp
-                sensor_data.device_id = self.device_id
+                sensor_data.timestamp_ms = timestamp_ms # Storage key, same instant
 
-                # 3. Read System Info
-                sys_info = self.sys_info_reader.read_system_info()
-                sys_info.timestamp = timestamp_iso # Use same timestamp
-                sys_info.device_id = self.device_id
+                # 3. Collect System Info (or reuse the last one, see above)
+                if sys_info_future is not None:
+                    self._sys_info = sys_info_future.result()
+                    self._sys_info.timestamp = timestamp_iso # Use same timestamp
+                # A reused reading keeps its own timestamp: it was not sampled now
+                sys_info = self._sys_info
 
                 # 4. Buffer Data for Storage
                 self._sensor_data_buffer.append(sensor_data)
-                self._measurement_count += 1
 
-                # 5. Save to Database (if interval reached)
-                if self._measurement_count >= self.config.db_save_interval_reads:
+                # 5. Save to Database (if size or time threshold reached)
+                # Large batches amortize the per-transaction cost over many rows
+                buffer_full = len(self._sensor_data_buffer) >= self.config.db_save_interval_reads
+                buffer_stale = time.monotonic() - self._last_save_time >= self.config.db_save_interval_seconds
+                if buffer_full or buffer_stale:
                     if self.storage.save_sensor_readings(self._sensor_data_buffer):
-                        logger.info(f"Saved {len(self._sensor_data_buffer)} readings to storage.")
-                        self._sensor_data_buffer = []
-                        self._measurement_count = 0
-                    else:
-                        logger.warning("Failed to save readings to storage. Buffer retained.")
-                        # Keep buffer, maybe add size limit later
-
-                # 6. Publish Data
-                if self.publisher.is_connected():
-                    pub_sensor_ok = self.publisher.publish_sensor_data(sensor_data)
-                    pub_info_ok = self.publisher.publish_info_data(sys_info)
-                    if pub_sensor_ok and pub_info_ok:
-                         logger.info(f"Published: T={sensor_data.temperature} H={sensor_data.humidity} L={sensor_data.light}")
+                        logger.info("Saved %s readings to storage.", len(self._sensor_data_buffer))
+                        self._sensor_data_buffer.clear()
+                        self._last_save_time = time.monotonic()
                     else:
-                         logger.warning("Failed to publish one or more messages.")
+                        logger.warning("Failed to save readings to storage. Buffer retained (%s readings, max %s).",
+                                       len(self._sensor_data_buffer), self._sensor_data_buffer.maxlen)
+
+                # 6. Publish Data (only on change, plus a periodic heartbeat)
+                # While disconnected the publisher buffers messages and sends them on reconnect
+                heartbeat = self._publish_cycle % max(1, self.config.publish_heartbeat_intervals) == 0
+                self._publish_cycle += 1
+                publish_sensor = heartbeat or _values_changed(sensor_data, self._last_published_sensor, self._sensor_deltas)
+                publish_info = connected and (heartbeat or _values_changed(sys_info, self._last_published_info, self._info_deltas))
+                pub_ok = True
+                if self.config.publish_combined_payload:
+                    # Either side changing sends both, so the single message is always complete
+                    publish_sensor = publish_sensor or publish_info
+                    if publish_sensor:
+                        if self.publisher.publish_combined(sensor_data, sys_info):
+                            self._last_published_sensor = sensor_data
+                            self._last_published_info = sys_info
+                            logger.info("Published: T=%s H=%s L=%s", sensor_data.temperature, sensor_data.humidity, sensor_data.light)
+                        else:
+                            pub_ok = False
                 else:
-                    logger.debug("Publisher not connected, skipping publish.")
-                    # Attempt connection on next publisher interaction implicitly
-
-                # 7. Calculate Sleep Time
-                elapsed_time = time.monotonic() - loop_start_time
-                sleep_time = max(0, self.config.read_interval_seconds - elapsed_time)
-
-                if sleep_time > 0:
-                    time.sleep(sleep_time)
+                    if publish_sensor:
+                        if self.publisher.publish_sensor_data(sensor_data):
+                            self._last_published_sensor = sensor_data
+                            logger.info("Published: T=%s H=%s L=%s", sensor_data.temperature, sensor_data.humidity, sensor_data.light)
+                        else:
+                            pub_ok = False
+                    if publish_info:
+                        if self.publisher.publish_info_data(sys_info):
+                            self._last_published_info = sys_info
+                        else:
+                            pub_ok = False
+                if not connected:
+                    logger.debug("Publisher not connected, messages held for reconnect.")
+                elif not pub_ok:
+                     logger.warning("Failed to publish one or more messages.")
+                elif not publish_sensor:
+                     logger.debug("Sensor values unchanged, skipping publish.")
+
+                if self.on_cycle:
+                    self.on_cycle()
+
+                # 7. Wait for the next scheduled read
+                now = time.monotonic()
+                if now < next_read:
+                    self._stop_event.wait(next_read - now) # Returns early on stop()
                 else:
-                    logger.warning(f"Main loop took {elapsed_time:.2f}s, longer than interval {self.config.read_interval_seconds}s.")
+                    logger.warning("Main loop took %.2fs, longer than interval %ss.", now - loop_start_time, self.config.read_interval_seconds)
+                    next_read = now # Resync instead of firing catch-up reads back to back
 
             except KeyboardInterrupt:
                 logger.info("KeyboardInterrupt received. Stopping...")
                 self._running = False
             except Exception as e:
-                logger.error(f"Unexpected error in main loop: {e}", exc_info=True)
+                # Can repeat every cycle; the traceback is only formatted at LOG_LEVEL=DEBUG
+                logger.error("Unexpected error in main loop: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
                 logger.info("Waiting 10 seconds before retrying...")
-                time.sleep(10) # Avoid rapid crash loops
+                self._stop_event.wait(10) # Avoid rapid crash loops
+                next_read = time.monotonic()
 
         self.shutdown()
 
+    def stop(self):
+        """Request the main loop to exit as soon as the current iteration finishes."""
+        self._running = False
+        self._stop_event.set()
+
     def shutdown(self):
-        """Graceful shutdown."""
-        logger.info("Shutting down Sensor Monitoring Service...")
+        """Graceful shutdown. Safe to call more than once."""
         self._running = False
+        if self._shut_down:
+            return
+        self._shut_down = True
+        logger.info("Shutting down Sensor Monitoring Service...")
 
         # Save any remaining data
         if self._sensor_data_buffer:
             logger.info(f"Saving remaining {len(self._sensor_data_buffer)} readings before exiting.")
-            self.storage.save_sensor_readings(self._sensor_data_buffer)
+            if self.storage.save_sensor_readings(self._sensor_data_buffer):
+                self._sensor_data_buffer.clear()
 
-        # Disconnect publisher
+        # Close storage
         try:
-            self.publisher.disconnect()
+            self.storage.close()
         except Exception as e:
-            logger.error(f"Error disconnecting publisher: {e}", exc_info=True)
+            logger.error(f"Error closing storage: {e}", exc_info=True)
 
-        # Stop admin listener
+        # Stop admin listener (before disconnecting, so the unsubscribe reaches the broker)
         try:
             if self.admin_listener:
                 self.admin_listener.stop_listening()
         except Exception as e:
             logger.error(f"Error stopping admin listener: {e}", exc_info=True)
 
+        # Disconnect publisher
+        try:
+            self.publisher.disconnect()
+        except Exception as e:
+            logger.error(f"Error disconnecting publisher: {e}", exc_info=True)
+
+        # Stop the reader threads
+        if self._read_pool:
+            self._read_pool.shutdown(wait=True)
+            self._read_pool = None
+
         # Cleanup sensors
         try:
             self.sensor_reader.cleanup()
         except Exception as e:
             logger.error(f"Error cleaning up sensor reader: {e}", exc_info=True)
 
+        # Close system info reader
+        try:
+            self.sys_info_reader.close()
+        except Exception as e:
+            logger.error(f"Error closing system info reader: {e}", exc_info=True)
+
         logger.info("Shutdown complete.")
 
@@ -8,13 +8,25 @@ i2c = busio.I2C(board.SCL, board.SDA)
 ltr = adafruit_ltr390.LTR390(i2c)
 dht_device = adafruit_dht.DHT22(board.D4)
 
+# The DHT22 delivers a new measurement at most every 2 s
+INTERVAL = 2.0
+next_read = time.monotonic()
+
 while True:
     try:
         temperature = dht_device.temperature
         humidity = dht_device.humidity
         uv_index = ltr.lux
         ambient_light = ltr.light
-        print(f"Temp: {temperature:.1f}°C, Hum: {humidity:.1f}%, UV: {uv_index:.1f}, Ambient Light: {ambient_light:.1f}")
+        if None in (temperature, humidity, uv_index, ambient_light):
+            print("Incomplete reading, skipping.")
+        else:
+            print(f"Temp: {temperature:.1f}°C, Hum: {humidity:.1f}%, UV: {uv_index:.1f}, Ambient Light: {ambient_light:.1f}")
     except Exception as e:
         print(f"Error: {e}")
-    time.sleep(2)
\ No newline at end of file
+    # Fixed grid: time spent reading doesn't push later reads back
+    next_read += INTERVAL
+    now = time.monotonic()
+    if next_read < now:
+        next_read = now + INTERVAL # Resync after a stall instead of reading back to back
+    time.sleep(next_read - now)
\ No newline at end of file